@@ -0,0 +1,235 @@
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from itertools import product
+from pathlib import Path
+
+from src.CryptoContext import CryptoContext
+from src.DES.DESCipher import DESCipher
+from src.DES.DESNumpy import numpy_available
+from src.DEAL.DEALCipher import DEALCipher
+from src.utils.constants import CipherMode, PaddingMode, BatchBackend
+
+
+CIPHERS = {
+    'DES': 8,
+    'DEAL-128': 16,
+    'DEAL-192': 24,
+    'DEAL-256': 32
+}
+# 64M и больше - только явно через --sizes: поблочные пути идут около 0.1 МБ/с
+DEFAULT_SIZES = ['64', '1K', '64K', '1M']
+# Потолок размера по умолчанию для случаев без пакетного шифрования
+SLOW_MAX_SIZE = '64K'
+SIZE_UNITS = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+OPERATIONS = ['encrypt', 'decrypt']
+APIS = ['sync', 'async', 'parallel']
+SEED = 20240101
+
+
+def parse_size(text: str) -> int:
+    """Переводит размер вида 64, 1K, 64M в байты"""
+    text = text.strip().upper().rstrip('B')
+    unit = SIZE_UNITS.get(text[-1:], 1)
+    number = text[:-1] if text[-1:] in SIZE_UNITS else text
+    return int(number) * unit
+
+
+def percentile(samples: list, fraction: float) -> int:
+    """Процентиль по методу ближайшего ранга"""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(len(ordered) * fraction))
+    return ordered[rank - 1]
+
+
+def make_cipher(name: str, backend: BatchBackend):
+    """Создает шифр с детерминированным ключом"""
+    key = random.Random(f'{SEED}-{name}').randbytes(CIPHERS[name])
+    if name == 'DES':
+        return DESCipher(key, backend=backend)
+    return DEALCipher(key)
+
+
+def is_slow_case(cipher_name: str, backend, mode: CipherMode) -> bool:
+    """Шифрование идет по одному блоку: DEAL, бэкенд BLOCK или сцепленный режим"""
+    batched_modes = (CipherMode.ECB, CipherMode.CTR, CipherMode.RANDOM_DELTA)
+    return cipher_name != 'DES' or backend == BatchBackend.BLOCK or mode not in batched_modes
+
+
+def backends_for(cipher_name: str, backends: list) -> list:
+    """Бэкенды пакетной обработки есть только у DES"""
+    if cipher_name != 'DES':
+        return [None]
+    if not numpy_available():
+        backends = [backend for backend in backends if backend != BatchBackend.NUMPY]
+    return backends
+
+
+class Benchmark:
+    def __init__(self, warmup: int, repeats: int, api: str = 'sync', workers: int = None):
+        self.warmup = warmup
+        self.repeats = repeats
+        self.api = api
+        self.workers = workers
+
+    def _operation(self, context: CryptoContext, operation: str, data: bytes):
+        """Возвращает функцию без аргументов, выполняющую одну операцию"""
+        if self.api == 'async':
+            method = context.encrypt_async if operation == 'encrypt' else context.decrypt_async
+            return lambda: asyncio.run(method(data))
+        if self.api == 'parallel':
+            method = context.encrypt_parallel if operation == 'encrypt' else context.decrypt_parallel
+            return lambda: method(data, self.workers)
+
+        method = context.encrypt if operation == 'encrypt' else context.decrypt
+        return lambda: method(data)
+
+    def measure(self, run) -> list:
+        """Прогревочные запуски, затем замеры в наносекундах"""
+        for _ in range(self.warmup):
+            run()
+
+        samples = []
+        for _ in range(self.repeats):
+            start = time.perf_counter_ns()
+            run()
+            samples.append(time.perf_counter_ns() - start)
+        return samples
+
+    def run_case(self, cipher_name: str, backend, mode: CipherMode, padding: PaddingMode, size: int) -> list:
+        cipher = make_cipher(cipher_name, backend or BatchBackend.AUTO)
+        rng = random.Random(f'{SEED}-{size}')
+        iv = rng.randbytes(cipher.block_size) if mode != CipherMode.ECB else None
+        plaintext = rng.randbytes(size)
+
+        results = []
+        with CryptoContext(cipher, mode, padding, iv, workers=self.workers) as context:
+            ciphertext = context.encrypt(plaintext)
+            if context.decrypt(ciphertext) != plaintext and padding != PaddingMode.ZEROS:
+                raise RuntimeError(f'Расшифрование не совпало: {cipher_name} {mode.name} {padding.name} {size}')
+
+            for operation in OPERATIONS:
+                data = plaintext if operation == 'encrypt' else ciphertext
+                samples = self.measure(self._operation(context, operation, data))
+                median = percentile(samples, 0.5)
+                results.append({
+                    'cipher': cipher_name,
+                    'backend': backend.name if backend else None,
+                    'mode': mode.name,
+                    'padding': padding.name,
+                    'size': size,
+                    'operation': operation,
+                    'api': self.api,
+                    'repeats': self.repeats,
+                    'median_ns': median,
+                    'p95_ns': percentile(samples, 0.95),
+                    'min_ns': min(samples),
+                    'mb_per_s': size / (1 << 20) / (median / 1e9) if median else None
+                })
+        return results
+
+
+def case_key(result: dict) -> tuple:
+    return (
+        result['cipher'], result['backend'], result['mode'], result['padding'],
+        result['size'], result['operation'], result['api']
+    )
+
+
+def compare(results: list, baseline: list, threshold: float) -> list:
+    """Случаи, в которых медиана выросла больше чем на threshold относительно эталона"""
+    reference = {case_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = reference.get(case_key(result))
+        if old is None or not old['median_ns']:
+            continue
+        change = result['median_ns'] / old['median_ns'] - 1
+        if change > threshold:
+            regressions.append({'case': result, 'baseline_median_ns': old['median_ns'], 'change': change})
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Замеры производительности DES/DEAL по режимам, набивкам и бэкендам')
+    parser.add_argument('--ciphers', nargs='+', default=list(CIPHERS), choices=list(CIPHERS))
+    parser.add_argument('--modes', nargs='+', default=[mode.name for mode in CipherMode],
+                        choices=[mode.name for mode in CipherMode])
+    parser.add_argument('--paddings', nargs='+', default=[padding.name for padding in PaddingMode],
+                        choices=[padding.name for padding in PaddingMode])
+    parser.add_argument('--backends', nargs='+', default=[backend.name for backend in BatchBackend],
+                        choices=[backend.name for backend in BatchBackend], help='Бэкенды пакетной обработки DES')
+    parser.add_argument('--sizes', nargs='+', default=None,
+                        help=f'Размеры сообщений: 64, 1K, 64M ... (по умолчанию {" ".join(DEFAULT_SIZES)}, '
+                             f'для поблочных случаев не больше {SLOW_MAX_SIZE})')
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--api', default='sync', choices=APIS,
+                        help='encrypt/decrypt, *_async или *_parallel (пул процессов)')
+    parser.add_argument('--workers', type=int, default=None, help='Число процессов для --api async/parallel')
+    parser.add_argument('--output', type=Path, help='Файл для результатов в JSON (по умолчанию stdout)')
+    parser.add_argument('--baseline', type=Path, help='JSON с эталонными результатами для сравнения')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Допустимый рост медианы, доля (0.10 = 10%%)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    benchmark = Benchmark(args.warmup, args.repeats, args.api, args.workers)
+    sizes = [parse_size(size) for size in args.sizes or DEFAULT_SIZES]
+    # Явно заданные размеры замеряются всегда, размеры по умолчанию ограничены для медленных случаев
+    slow_max_size = parse_size(SLOW_MAX_SIZE) if args.sizes is None else None
+    backends = [BatchBackend[name] for name in args.backends]
+
+    results = []
+    for cipher_name in args.ciphers:
+        cases = product(backends_for(cipher_name, backends), args.modes, args.paddings, sizes)
+        for backend, mode, padding, size in cases:
+            if slow_max_size and size > slow_max_size and is_slow_case(cipher_name, backend, CipherMode[mode]):
+                continue
+            print(f'{cipher_name} {backend.name if backend else "-"} {mode} {padding} {size} B', file=sys.stderr)
+            results.extend(benchmark.run_case(cipher_name, backend, CipherMode[mode], PaddingMode[padding], size))
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': numpy_available(),
+            'api': args.api,
+            'workers': args.workers,
+            'warmup': args.warmup,
+            'repeats': args.repeats
+        },
+        'results': results
+    }
+
+    exit_code = 0
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding='utf-8'))['results']
+        report['regressions'] = compare(results, baseline, args.threshold)
+        for regression in report['regressions']:
+            case = regression['case']
+            print(
+                f"РЕГРЕССИЯ {case['cipher']} {case['backend'] or '-'} {case['mode']} {case['padding']} "
+                f"{case['size']} B {case['operation']}: {regression['change']:+.1%}",
+                file=sys.stderr
+            )
+        exit_code = 1 if report['regressions'] else 0
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(text, encoding='utf-8')
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,138 @@
+from src.utils.constants import PaddingMode
+from src.utils.block_utils import padding_block, unpadding, split_blocks, join_blocks
+
+
+class StreamEncryptor:
+    def __init__(self, context, keystream=None):
+        self.context = context
+        self.block_size = context.block_size
+        self._iv = context.iv
+        self._keystream = keystream
+        self._buffer = b''
+        self._finalized = False
+        self._bytes_in = 0
+        self._bytes_out = 0
+        self._blocks = 0
+
+    def _check_active(self):
+        if self._finalized:
+            raise ValueError("Шифрование уже завершено вызовом finalize()")
+
+    def _process(self, data: bytes) -> bytes:
+        blocks = split_blocks(data, self.block_size)
+        self._blocks += len(blocks)
+        with self.context.timer('mode'):
+            if self._keystream is not None:
+                # Заранее выработанный поток ключей OFB: остается только XOR
+                processed_blocks = self._keystream.process_blocks(blocks)
+            else:
+                processed_blocks = self.context.encrypt_blocks(blocks, self._iv)
+        self._iv = self.context.next_iv(self._iv, blocks, processed_blocks, True)
+        return join_blocks(processed_blocks)
+
+    def update(self, data: bytes) -> bytes:
+        self._check_active()
+
+        self._bytes_in += len(data)
+        data = self._buffer + bytes(data)
+        usable = len(data) - len(data) % self.block_size
+        self._buffer = data[usable:]
+
+        return self._output(self._process(data[:usable]) if usable else b'')
+
+    def _output(self, data: bytes) -> bytes:
+        self._bytes_out += len(data)
+        return data
+
+    def _count_message(self):
+        if self.context.stats is not None:
+            self.context.count_messages(self._bytes_in, self._bytes_out, self._blocks)
+
+    def finalize(self) -> bytes:
+        self._check_active()
+        self._finalized = True
+
+        # Набивка добавляется только к хвосту сообщения
+        with self.context.timer('padding'):
+            tail = padding_block(self._buffer, self.block_size, self.context.padding)
+        result = self._output(self._process(tail))
+        self._count_message()
+        return result
+
+
+class StreamDecryptor:
+    def __init__(self, context, keystream=None):
+        self.context = context
+        self.block_size = context.block_size
+        self._iv = context.iv
+        self._keystream = keystream
+        self._held = b''
+        self._zero_run = 0
+        self._finalized = False
+        self._bytes_in = 0
+        self._bytes_out = 0
+        self._blocks = 0
+
+    def _check_active(self):
+        if self._finalized:
+            raise ValueError("Расшифрование уже завершено вызовом finalize()")
+
+    def _process(self, data: bytes) -> bytes:
+        blocks = split_blocks(data, self.block_size)
+        self._blocks += len(blocks)
+        with self.context.timer('mode'):
+            if self._keystream is not None:
+                processed_blocks = self._keystream.process_blocks(blocks)
+            else:
+                processed_blocks = self.context.decrypt_blocks(blocks, self._iv)
+        self._iv = self.context.next_iv(self._iv, blocks, processed_blocks, False)
+        return join_blocks(processed_blocks)
+
+    def update(self, data: bytes) -> bytes:
+        self._check_active()
+
+        # Последний блок придерживается до finalize(), чтобы снять набивку
+        self._bytes_in += len(data)
+        data = self._held + bytes(data)
+        cut = (len(data) - 1) // self.block_size * self.block_size if data else 0
+        self._held = data[cut:]
+        if not cut:
+            return b''
+
+        plaintext = self._process(data[:cut])
+        if self.context.padding != PaddingMode.ZEROS:
+            return self._output(plaintext)
+
+        # Нулевая набивка снимает все нулевые байты в конце сообщения,
+        # поэтому хвост из нулей откладывается до следующих данных
+        stripped = plaintext.rstrip(b'\x00')
+        trailing_zeros = len(plaintext) - len(stripped)
+        if stripped:
+            stripped = bytes(self._zero_run) + stripped
+            self._zero_run = 0
+        self._zero_run += trailing_zeros
+        return self._output(stripped)
+
+    def _output(self, data: bytes) -> bytes:
+        self._bytes_out += len(data)
+        return data
+
+    def _count_message(self):
+        if self.context.stats is not None:
+            self.context.count_messages(self._bytes_in, self._bytes_out, self._blocks)
+
+    def finalize(self) -> bytes:
+        self._check_active()
+        self._finalized = True
+
+        if not self._held:
+            self._count_message()
+            return b''
+        if len(self._held) != self.block_size:
+            raise ValueError("Сообщение должно быть кратно размеру блоков")
+
+        final = self._process(self._held)
+        with self.context.timer('unpadding'):
+            result = self._output(unpadding(bytes(self._zero_run) + final, self.context.padding))
+        self._count_message()
+        return result
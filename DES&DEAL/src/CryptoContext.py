@@ -1,8 +1,32 @@
 import asyncio
-from typing import List, Optional
+import mmap
+import os
+import pickle
+from contextlib import nullcontext
+from functools import lru_cache
+from time import perf_counter_ns
+from typing import BinaryIO, Callable, List, Optional, Tuple
 from src.utils.constants import CipherMode, PaddingMode
-from src.utils.bit_utils import xor_bytes
-from src.utils.block_utils import padding, unpadding, split_blocks, join_blocks
+from src.utils.bit_utils import xor_bytes, xor_into, random_bytes, random_blocks
+from src.utils.block_utils import padded_blocks, padding_block, unpadded_blocks, unpadded_length, split_blocks, join_blocks, counter_blocks, counter_value
+from src.utils.block_memo import BlockMemo
+from src.utils.instrumentation import CipherStats, NO_TIMER
+from src.interfaces import ISymmetricCipher
+from src.ParallelEngine import ParallelEngine
+from src.CipherStream import StreamEncryptor, StreamDecryptor
+from src.OFBKeystream import OFBKeystream
+
+
+STREAM_CHUNK_SIZE = 1 << 20
+FILE_REGION_SIZE = 1 << 20
+
+
+@lru_cache(maxsize=None)
+def _random_delta_tables(block_size: int) -> tuple:
+    return tuple(
+        bytes(c ^ ((c * 17 + i * 13) % 256) for c in range(256))
+        for i in range(block_size)
+    )
 
 
 class CryptoContext:
@@ -11,13 +35,20 @@ class CryptoContext:
         cipher,
         mode: CipherMode,
         padding_mode: PaddingMode,
-        iv: Optional[bytes] = None
+        iv: Optional[bytes] = None,
+        workers: Optional[int] = None,
+        ecb_memo_size: Optional[int] = None
     ):
         self.cipher = cipher
         self.mode = mode
         self.padding = padding_mode
         self.iv = iv
         self.block_size = cipher.block_size
+        self.workers = workers
+        self._parallel = None
+        # Кэш блоков ECB включается явно: он окупается только на избыточных данных
+        self._ecb_memos = {True: BlockMemo(ecb_memo_size), False: BlockMemo(ecb_memo_size)} if ecb_memo_size else None
+        self.stats = None
         self._validate_parameters()
 
     def _validate_parameters(self):
@@ -27,77 +58,439 @@ class CryptoContext:
             if len(self.iv) != self.block_size:
                 raise ValueError(f"IV должен быть {self.block_size} в байтах, но он {len(self.iv)}")
 
+    def enable_stats(self, stats: Optional[CipherStats] = None, callback: Optional[Callable] = None) -> CipherStats:
+        # Пока статистика выключена, горячие пути проверяют только self.stats is None
+        self.stats = stats or CipherStats(callback)
+        if hasattr(self.cipher, 'stats'):
+            self.cipher.stats = self.stats
+        return self.stats
+
+    def disable_stats(self):
+        self.stats = None
+        if hasattr(self.cipher, 'stats'):
+            self.cipher.stats = None
+
+    def timer(self, phase: str):
+        if self.stats is None:
+            return NO_TIMER
+        return self.stats.timer(self.mode.name, phase)
+
+    def count_messages(self, bytes_in: int, bytes_out: int, blocks: int, messages: int = 1):
+        mode = self.mode.name
+        self.stats.count(mode, 'messages', messages)
+        self.stats.count(mode, 'blocks', blocks)
+        self.stats.count(mode, 'bytes_in', bytes_in)
+        self.stats.count(mode, 'bytes_out', bytes_out)
+
+    def _probe_loop_lag(self):
+        # Задержка цикла событий: насколько позже запланированного выполняется call_soon
+        stats = self.stats
+        scheduled = perf_counter_ns()
+        asyncio.get_running_loop().call_soon(lambda: stats.record_loop_lag(perf_counter_ns() - scheduled))
+
+    def ecb_memo_stats(self) -> Optional[dict]:
+        if self._ecb_memos is None:
+            return None
+        return {'encrypt': self._ecb_memos[True].stats(), 'decrypt': self._ecb_memos[False].stats()}
+
+    def generate_iv(self) -> bytes:
+        return random_bytes(self.block_size)
+
+    def generate_ivs(self, count: int) -> List[bytes]:
+        return random_blocks(count, self.block_size)
+
     def encrypt(self, data: bytes) -> bytes:
-        padded_data = padding(data, self.block_size, self.padding)
-        blocks = split_blocks(padded_data, self.block_size)
+        with self.timer('padding'):
+            blocks = padded_blocks(data, self.block_size, self.padding)
+        
+        with self.timer('mode'):
+            encrypted_blocks = self.encrypt_blocks(blocks)
         
-        encrypted_blocks = self.encrypt_blocks(blocks)
+        with self.timer('join'):
+            result = join_blocks(encrypted_blocks)
         
-        return join_blocks(encrypted_blocks)
+        if self.stats is not None:
+            self.count_messages(len(data), len(result), len(blocks))
+        return result
 
     def decrypt(self, data: bytes) -> bytes:
         if len(data) % self.block_size != 0:
             raise ValueError("Сообщение должно быть кратно размеру блоков")
         
-        blocks = split_blocks(data, self.block_size)
+        with self.timer('split'):
+            blocks = split_blocks(data, self.block_size)
         
-        decrypted_blocks = self.decrypt_blocks(blocks)
+        with self.timer('mode'):
+            decrypted_blocks = self.decrypt_blocks(blocks)
         
-        decrypted_data = join_blocks(decrypted_blocks)
-        return unpadding(decrypted_data, self.padding)
+        with self.timer('unpadding'):
+            decrypted_blocks = unpadded_blocks(decrypted_blocks, self.padding)
+        
+        with self.timer('join'):
+            result = join_blocks(decrypted_blocks)
+        
+        if self.stats is not None:
+            self.count_messages(len(data), len(result), len(blocks))
+        return result
 
     async def encrypt_async(self, data: bytes) -> bytes:
-        padded_data = padding(data, self.block_size, self.padding)
-        blocks = split_blocks(padded_data, self.block_size)
+        if self.stats is not None:
+            self._probe_loop_lag()
+        
+        with self.timer('padding'):
+            blocks = padded_blocks(data, self.block_size, self.padding)
         
-        encrypted_blocks = await self.encrypt_blocks_async(blocks)
+        with self.timer('mode'):
+            encrypted_blocks = await self.encrypt_blocks_async(blocks)
         
-        return join_blocks(encrypted_blocks)
+        with self.timer('join'):
+            result = join_blocks(encrypted_blocks)
+        
+        if self.stats is not None:
+            self.count_messages(len(data), len(result), len(blocks))
+        return result
 
     async def decrypt_async(self, data: bytes) -> bytes:
         if len(data) % self.block_size != 0:
             raise ValueError("Сообщение должно быть кратно размеру блоков)")
+        if self.stats is not None:
+            self._probe_loop_lag()
+        
+        with self.timer('split'):
+            blocks = split_blocks(data, self.block_size)
+        
+        with self.timer('mode'):
+            decrypted_blocks = await self.decrypt_blocks_async(blocks)
+        
+        with self.timer('unpadding'):
+            decrypted_blocks = unpadded_blocks(decrypted_blocks, self.padding)
+        
+        with self.timer('join'):
+            result = join_blocks(decrypted_blocks)
+        
+        if self.stats is not None:
+            self.count_messages(len(data), len(result), len(blocks))
+        return result
+
+    def encrypt_many(self, messages: List[Tuple[bytes, Optional[bytes]]]) -> List[bytes]:
+        # Цепочки разных сообщений независимы: на каждом шаге очередные блоки всех
+        # сообщений обрабатываются одним пакетом, по одной дорожке на сообщение
+        lanes = [padded_blocks(data, self.block_size, self.padding) for data, _ in messages]
+        ivs = [iv or self.iv for _, iv in messages]
+        if self.mode != CipherMode.ECB:
+            for iv in ivs:
+                if len(iv) != self.block_size:
+                    raise ValueError(f"IV должен быть {self.block_size} в байтах, но он {len(iv)}")
+        
+        # Дорожки упорядочены по убыванию длины, поэтому активные всегда идут первыми
+        order = sorted(range(len(lanes)), key=lambda lane: len(lanes[lane]), reverse=True)
+        states = [ivs[lane] for lane in order]
+        results = [[] for _ in order]
+        active = len(order)
+        
+        with self.timer('mode'):
+            for step in range(len(lanes[order[0]]) if order else 0):
+                while len(lanes[order[active - 1]]) <= step:
+                    active -= 1
+                
+                blocks = [lanes[lane][step] for lane in order[:active]]
+                step_ivs = [ivs[lane] for lane in order[:active]]
+                outputs, states[:active] = self._lane_step(blocks, states[:active], step_ivs, step)
+                for position, output in enumerate(outputs):
+                    results[position].append(output)
+        
+        ciphertexts = [b''] * len(lanes)
+        for position, lane in enumerate(order):
+            ciphertexts[lane] = join_blocks(results[position])
+        
+        if self.stats is not None:
+            self.count_messages(
+                sum(len(data) for data, _ in messages), sum(map(len, ciphertexts)),
+                sum(map(len, lanes)), len(messages)
+            )
+        return ciphertexts
+
+    def _lane_step(self, blocks: List[bytes], states: List[bytes], ivs: List[bytes], step: int) -> tuple:
+        if self.mode == CipherMode.ECB:
+            return self._process_ecb(blocks, True), states
+        
+        if self.mode in (CipherMode.CBC, CipherMode.PCBC):
+            encrypted = self._cipher_blocks(self._xor_block_lists(blocks, states), True)
+            if self.mode == CipherMode.CBC:
+                return encrypted, encrypted
+            return encrypted, self._xor_block_lists(blocks, encrypted)
+        
+        if self.mode == CipherMode.CTR:
+            keystreams = self._cipher_blocks([counter_value(iv, step) for iv in ivs], True)
+        elif self.mode == CipherMode.RANDOM_DELTA:
+            keystreams = self._cipher_blocks([self._random_delta_counters(1, iv, step) for iv in ivs], True)
+        else:
+            keystreams = self._cipher_blocks(states, True)
+        
+        processed = self._xor_block_lists(blocks, keystreams)
+        if self.mode == CipherMode.CFB:
+            return processed, processed
+        if self.mode == CipherMode.OFB:
+            return processed, keystreams
+        return processed, states
+
+    def encryptor(self, keystream: Optional[OFBKeystream] = None) -> StreamEncryptor:
+        return StreamEncryptor(self, keystream)
+
+    def decryptor(self, keystream: Optional[OFBKeystream] = None) -> StreamDecryptor:
+        return StreamDecryptor(self, keystream)
+
+    def keystream(self, iv: Optional[bytes] = None, buffer_blocks: int = 4096) -> OFBKeystream:
+        # Запускается заранее, например при установке сеанса
+        return OFBKeystream(self, iv, buffer_blocks)
+
+    def encrypt_stream(self, src: BinaryIO, dst: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE) -> int:
+        return self._pipe_stream(self.encryptor(), src, dst, chunk_size)
+
+    def decrypt_stream(self, src: BinaryIO, dst: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE) -> int:
+        return self._pipe_stream(self.decryptor(), src, dst, chunk_size)
+
+    def _pipe_stream(self, processor, src: BinaryIO, dst: BinaryIO, chunk_size: int) -> int:
+        written = 0
+        
+        while True:
+            chunk = src.read(chunk_size)
+            if not chunk:
+                break
+            written += dst.write(processor.update(chunk))
+        
+        written += dst.write(processor.finalize())
+        return written
+
+    def next_iv(self, iv: Optional[bytes], in_blocks: List[bytes], out_blocks: List[bytes], encrypt: bool) -> Optional[bytes]:
+        # Состояние режима после обработки блоков: IV для следующей порции данных
+        if self.mode == CipherMode.ECB or not in_blocks:
+            return iv
+        if self.mode in (CipherMode.CTR, CipherMode.RANDOM_DELTA):
+            return self._counter_at(len(in_blocks), iv)
+        if self.mode in (CipherMode.CBC, CipherMode.CFB):
+            return out_blocks[-1] if encrypt else in_blocks[-1]
+        # PCBC: P xor C; OFB: C xor P - последний блок потока ключей
+        return xor_bytes(in_blocks[-1], out_blocks[-1])
+
+    def encrypt_file(self, path_in: str, path_out: str, workers: Optional[int] = None) -> int:
+        size = os.path.getsize(path_in)
+        body_size = size - size % self.block_size
+        out_size = body_size + self.block_size
+        
+        with open(path_in, 'rb') as src, open(path_out, 'w+b') as dst:
+            dst.truncate(out_size)
+            with self._map_file(src, size) as src_map, mmap.mmap(dst.fileno(), out_size) as dst_map:
+                with self.timer('mode'):
+                    iv = self._process_file_regions(path_in, path_out, src_map, dst_map, body_size, True, workers)
+                
+                # Набивка затрагивает только последний блок
+                with self.timer('padding'):
+                    tail = padding_block(src_map[body_size:size], self.block_size, self.padding)
+                with self.timer('mode'):
+                    dst_map[body_size:out_size] = join_blocks(self.encrypt_blocks([tail], iv))
+        
+        if self.stats is not None:
+            self.count_messages(size, out_size, out_size // self.block_size)
+        return out_size
+
+    def decrypt_file(self, path_in: str, path_out: str, workers: Optional[int] = None) -> int:
+        size = os.path.getsize(path_in)
+        if size % self.block_size != 0:
+            raise ValueError("Сообщение должно быть кратно размеру блоков")
         
-        blocks = split_blocks(data, self.block_size)
+        with open(path_in, 'rb') as src, open(path_out, 'w+b') as dst:
+            if not size:
+                return 0
+            
+            dst.truncate(size)
+            with self._map_file(src, size) as src_map, mmap.mmap(dst.fileno(), size) as dst_map:
+                with self.timer('mode'):
+                    self._process_file_regions(path_in, path_out, src_map, dst_map, size, False, workers)
+                with self.timer('unpadding'):
+                    plaintext_size = self._unpadded_size(dst_map, size)
+            dst.truncate(plaintext_size)
+        
+        if self.stats is not None:
+            self.count_messages(size, plaintext_size, size // self.block_size)
+        return plaintext_size
+
+    def _map_file(self, file: BinaryIO, size: int):
+        if not size:
+            return nullcontext(b'')
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _process_file_regions(self, path_in: str, path_out: str, src_map, dst_map, length: int, encrypt: bool, workers: Optional[int]) -> Optional[bytes]:
+        offsets = range(0, length, FILE_REGION_SIZE)
+        
+        if self.supports_parallel(encrypt) and len(offsets) > 1:
+            regions = []
+            for offset in offsets:
+                previous_block = bytes(src_map[offset - self.block_size:offset]) if offset else None
+                iv = self.chunk_iv(offset // self.block_size, previous_block)
+                regions.append((offset, min(FILE_REGION_SIZE, length - offset), iv))
+            
+            dst_map.flush()
+            self._get_parallel_engine(workers).process_file(path_in, path_out, regions, encrypt)
+            
+            previous_block = bytes(src_map[length - self.block_size:length])
+            return self.chunk_iv(length // self.block_size, previous_block)
+        
+        iv = self.iv
+        with memoryview(src_map) as view:
+            for offset in offsets:
+                region = view[offset:min(offset + FILE_REGION_SIZE, length)]
+                iv = self.process_region(region, dst_map, offset, encrypt, iv)
+        return iv
+
+    def process_region(self, source: memoryview, target, offset: int, encrypt: bool, iv: Optional[bytes]) -> Optional[bytes]:
+        if self.mode in (CipherMode.CTR, CipherMode.RANDOM_DELTA):
+            return self._process_counter_region(source, target, offset, iv)
+        if self.mode == CipherMode.ECB and self._ecb_memos is None:
+            # Блоки шифруются пакетом прямо из входного отображения в выходное
+            method = self._cipher_method(encrypt)
+            with source, memoryview(target) as view:
+                method(source, view[offset:offset + len(source)])
+            return iv
+        
+        with source:
+            blocks = split_blocks(source.tobytes(), self.block_size)
+        
+        method = self.encrypt_blocks if encrypt else self.decrypt_blocks
+        processed_blocks = method(blocks, iv)
+        target[offset:offset + len(blocks) * self.block_size] = join_blocks(processed_blocks)
+        
+        return self.next_iv(iv, blocks, processed_blocks, encrypt)
+
+    def _process_counter_region(self, source: memoryview, target, offset: int, iv: Optional[bytes]) -> bytes:
+        # Поток ключей не зависит от данных: XOR пишется сразу в выходной буфер
+        length = len(source)
+        count = length // self.block_size
+        keystream = self._cipher_buffer(join_blocks(self._mode_counters(count, iv)), True)
+        
+        with source, memoryview(target) as view:
+            xor_into(view[offset:offset + length], source, keystream)
+        
+        return self._counter_at(count, iv)
+
+    def _unpadded_size(self, data, size: int) -> int:
+        if self.padding == PaddingMode.ZEROS:
+            end = size
+            while end > 0:
+                start = max(0, end - FILE_REGION_SIZE)
+                stripped = bytes(data[start:end]).rstrip(b'\x00')
+                if stripped:
+                    return start + len(stripped)
+                end = start
+            return 0
+        
+        # Размер набивки записан в одном байте, поэтому хватает последних 256 байт
+        tail_start = max(0, size - 256)
+        return tail_start + unpadded_length(data[tail_start:size], self.padding)
+
+    def decrypt_range(self, source, offset: int, length: int) -> bytes:
+        # Расшифровывает только блоки, пересекающиеся с диапазоном [offset, offset + length)
+        if not self.supports_parallel(False):
+            raise ValueError(f"Режим {self.mode} не допускает произвольного доступа к шифртексту")
+        if offset < 0 or length < 0:
+            raise ValueError("Смещение и длина диапазона должны быть неотрицательными")
+        
+        end = min(offset + length, self.plaintext_size(source))
+        if offset >= end:
+            return b''
+        
+        first = offset - offset % self.block_size
+        last = -(-end // self.block_size) * self.block_size
+        with self.timer('mode'):
+            plaintext = self._decrypt_span(source, first, last)
+        
+        if self.stats is not None:
+            self.count_messages(last - first, end - offset, (last - first) // self.block_size)
+        return plaintext[offset - first:end - first]
+
+    def plaintext_size(self, source) -> int:
+        size = self._source_size(source)
+        if size % self.block_size != 0:
+            raise ValueError("Сообщение должно быть кратно размеру блоков")
+        if not size:
+            return 0
+        
+        if self.padding == PaddingMode.ZEROS:
+            end = size
+            while end > 0:
+                start = max(0, end - FILE_REGION_SIZE)
+                stripped = self._decrypt_span(source, start, end).rstrip(b'\x00')
+                if stripped:
+                    return start + len(stripped)
+                end = start
+            return 0
+        
+        # Обычно набивка целиком лежит в последнем блоке; иначе дочитываем столько блоков,
+        # сколько указано в последнем байте
+        last_block = self._decrypt_span(source, size - self.block_size, size)
+        tail_start = max(0, size - last_block[-1]) // self.block_size * self.block_size
+        if tail_start < size - self.block_size:
+            tail = self._decrypt_span(source, tail_start, size)
+        else:
+            tail_start, tail = size - self.block_size, last_block
         
-        decrypted_blocks = await self.decrypt_blocks_async(blocks)
+        return tail_start + unpadded_length(tail, self.padding)
+
+    def _decrypt_span(self, source, start: int, end: int) -> bytes:
+        previous_block = self._read_source(source, start - self.block_size, start) if start else None
+        blocks = split_blocks(self._read_source(source, start, end), self.block_size)
         
-        decrypted_data = join_blocks(decrypted_blocks)
-        return unpadding(decrypted_data, self.padding)
+        iv = self.chunk_iv(start // self.block_size, previous_block)
+        return join_blocks(self.decrypt_blocks(blocks, iv))
 
-    def encrypt_blocks(self, blocks: List[bytes]) -> List[bytes]:
+    def _source_size(self, source) -> int:
+        if hasattr(source, 'read'):
+            return source.seek(0, os.SEEK_END)
+        return len(source)
+
+    def _read_source(self, source, start: int, end: int) -> bytes:
+        if hasattr(source, 'read'):
+            source.seek(start)
+            return source.read(end - start)
+        return bytes(source[start:end])
+
+    def encrypt_blocks(self, blocks: List[bytes], iv: Optional[bytes] = None) -> List[bytes]:
+        iv = iv or self.iv
+        
         if self.mode == CipherMode.ECB:
             return self.encrypt_ecb(blocks)
         elif self.mode == CipherMode.CBC:
-            return self.encrypt_cbc(blocks)
+            return self.encrypt_cbc(blocks, iv)
         elif self.mode == CipherMode.PCBC:
-            return self.encrypt_pcbc(blocks)
+            return self.encrypt_pcbc(blocks, iv)
         elif self.mode == CipherMode.CFB:
-            return self.encrypt_cfb(blocks)
+            return self.encrypt_cfb(blocks, iv)
         elif self.mode == CipherMode.OFB:
-            return self.encrypt_ofb(blocks)
+            return self.encrypt_ofb(blocks, iv)
         elif self.mode == CipherMode.CTR:
-            return self.encrypt_ctr(blocks)
+            return self.encrypt_ctr(blocks, iv)
         elif self.mode == CipherMode.RANDOM_DELTA:
-            return self.encrypt_random_delta(blocks)
+            return self.encrypt_random_delta(blocks, iv)
         else:
             raise ValueError(f"Неподдерживаемый режим: {self.mode}")
 
-    def decrypt_blocks(self, blocks: List[bytes]) -> List[bytes]:
+    def decrypt_blocks(self, blocks: List[bytes], iv: Optional[bytes] = None) -> List[bytes]:
+        iv = iv or self.iv
+        
         if self.mode == CipherMode.ECB:
             return self.decrypt_ecb(blocks)
         elif self.mode == CipherMode.CBC:
-            return self.decrypt_cbc(blocks)
+            return self.decrypt_cbc(blocks, iv)
         elif self.mode == CipherMode.PCBC:
-            return self.decrypt_pcbc(blocks)
+            return self.decrypt_pcbc(blocks, iv)
         elif self.mode == CipherMode.CFB:
-            return self.decrypt_cfb(blocks)
+            return self.decrypt_cfb(blocks, iv)
         elif self.mode == CipherMode.OFB:
-            return self.decrypt_ofb(blocks)
+            return self.decrypt_ofb(blocks, iv)
         elif self.mode == CipherMode.CTR:
-            return self.decrypt_ctr(blocks)
+            return self.decrypt_ctr(blocks, iv)
         elif self.mode == CipherMode.RANDOM_DELTA:
-            return self.decrypt_random_delta(blocks)
+            return self.decrypt_random_delta(blocks, iv)
         else:
             raise ValueError(f"Неподдерживаемый режим: {self.mode}")
 
@@ -111,7 +504,7 @@ class CryptoContext:
         elif self.mode == CipherMode.RANDOM_DELTA:
             return await self.encrypt_random_delta_async(blocks)
         else:
-            return self.encrypt_blocks(blocks)
+            return await asyncio.to_thread(self.encrypt_blocks, blocks)
 
     async def decrypt_blocks_async(self, blocks: List[bytes]) -> List[bytes]:
         if self.mode == CipherMode.ECB:
@@ -122,21 +515,104 @@ class CryptoContext:
             return await self.decrypt_ofb_async(blocks)
         elif self.mode == CipherMode.RANDOM_DELTA:
             return await self.decrypt_random_delta_async(blocks)
+        elif self.mode in (CipherMode.CBC, CipherMode.CFB):
+            return await self._process_parallel(blocks, False)
         else:
-            return self.decrypt_blocks(blocks)
+            return await asyncio.to_thread(self.decrypt_blocks, blocks)
 
-    async def _process_parallel(self, blocks: List[bytes], encrypt: bool) -> List[bytes]:
-        async def process_block(block, encrypt):
-            sync_method = self.cipher.encrypt_block if encrypt else self.cipher.decrypt_block
-            async_method_name = 'encrypt_block_async' if encrypt else 'decrypt_block_async'
-            
-            if hasattr(self.cipher, async_method_name):
-                async_method = getattr(self.cipher, async_method_name)
-                return await async_method(block)
+    def supports_parallel(self, encrypt: bool) -> bool:
+        if self.mode in (CipherMode.ECB, CipherMode.CTR, CipherMode.RANDOM_DELTA):
+            return True
+        return not encrypt and self.mode in (CipherMode.CBC, CipherMode.CFB)
+
+    def chunk_iv(self, start: int, previous_block: Optional[bytes] = None) -> Optional[bytes]:
+        # Начальное состояние режима для куска сообщения, начинающегося с блока start;
+        # previous_block - блок шифртекста перед куском
+        if self.mode == CipherMode.ECB:
+            return None
+        if self.mode in (CipherMode.CTR, CipherMode.RANDOM_DELTA):
+            return self._counter_at(start)
+        if self.mode in (CipherMode.CBC, CipherMode.CFB):
+            return self.iv if start == 0 else previous_block
+        raise ValueError(f"Режим {self.mode} не допускает параллельной обработки")
+
+    def parallel_fingerprint(self) -> tuple:
+        # Все, что процессы пула получают в снимке контекста и что влияет на результат
+        round_keys = getattr(self.cipher, 'round_keys', None)
+        key_state = tuple(round_keys) if round_keys is not None else pickle.dumps(self.cipher)
+        return self.mode, self.iv, key_state
+
+    def _get_parallel_engine(self, workers: Optional[int] = None) -> ParallelEngine:
+        workers = workers or self.workers
+        if self._parallel is not None and workers and self._parallel.workers != workers:
+            self._parallel.close()
+            self._parallel = None
+        # Снимок в процессах устарел (сменились ключи или режим): пул пересоздается
+        if self._parallel is not None and self._parallel.fingerprint not in (None, self.parallel_fingerprint()):
+            self._parallel.close()
+        if self._parallel is None:
+            self._parallel = ParallelEngine(self, workers)
+        return self._parallel
+
+    def encrypt_parallel(self, data: bytes, workers: Optional[int] = None) -> bytes:
+        with self.timer('padding'):
+            blocks = padded_blocks(data, self.block_size, self.padding)
+        
+        with self.timer('mode'):
+            if self.supports_parallel(True):
+                encrypted_blocks = self._get_parallel_engine(workers).process(blocks, True)
+            else:
+                encrypted_blocks = self.encrypt_blocks(blocks)
+        
+        with self.timer('join'):
+            result = join_blocks(encrypted_blocks)
+        
+        if self.stats is not None:
+            self.count_messages(len(data), len(result), len(blocks))
+        return result
+
+    def decrypt_parallel(self, data: bytes, workers: Optional[int] = None) -> bytes:
+        if len(data) % self.block_size != 0:
+            raise ValueError("Сообщение должно быть кратно размеру блоков")
+        
+        with self.timer('split'):
+            blocks = split_blocks(data, self.block_size)
+        
+        with self.timer('mode'):
+            if self.supports_parallel(False):
+                decrypted_blocks = self._get_parallel_engine(workers).process(blocks, False)
             else:
-                return sync_method(block)
+                decrypted_blocks = self.decrypt_blocks(blocks)
+        
+        with self.timer('unpadding'):
+            decrypted_blocks = unpadded_blocks(decrypted_blocks, self.padding)
         
-        return await asyncio.gather(*[process_block(block, encrypt) for block in blocks])
+        with self.timer('join'):
+            result = join_blocks(decrypted_blocks)
+        
+        if self.stats is not None:
+            self.count_messages(len(data), len(result), len(blocks))
+        return result
+
+    async def _process_parallel(self, blocks: List[bytes], encrypt: bool) -> List[bytes]:
+        return await self._get_parallel_engine().process_async(blocks, encrypt)
+
+    def close(self):
+        if self._parallel is not None:
+            self._parallel.close()
+            self._parallel = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_parallel'] = None
+        state['stats'] = None
+        return state
 
     async def encrypt_ecb_async(self, blocks: List[bytes]) -> List[bytes]:
         return await self._process_parallel(blocks, True)
@@ -145,63 +621,65 @@ class CryptoContext:
         return await self._process_parallel(blocks, False)
 
     async def encrypt_ctr_async(self, blocks: List[bytes]) -> List[bytes]:
-        counters = self._generate_counters(len(blocks))
-        
-        async def encrypt_counter(counter):
-            if hasattr(self.cipher, 'encrypt_block_async'):
-                return await self.cipher.encrypt_block_async(counter)
-            else:
-                return self.cipher.encrypt_block(counter)
-        
-        keystreams = await asyncio.gather(*[encrypt_counter(counter) for counter in counters])
-        
-        return [xor_bytes(block, keystream) for block, keystream in zip(blocks, keystreams)]
+        return await self._process_parallel(blocks, True)
 
     async def decrypt_ctr_async(self, blocks: List[bytes]) -> List[bytes]:
         return await self.encrypt_ctr_async(blocks)
 
     async def encrypt_ofb_async(self, blocks: List[bytes]) -> List[bytes]:
-        result = []
-        keystream = self.iv
-        
-        for block in blocks:
-            if hasattr(self.cipher, 'encrypt_block_async'):
-                keystream = await self.cipher.encrypt_block_async(keystream)
-            else:
-                keystream = self.cipher.encrypt_block(keystream)
-            result.append(xor_bytes(block, keystream))
-        
-        return result
+        # Вся цепочка потока ключей строится в рабочем потоке, не блокируя цикл событий
+        return await asyncio.to_thread(self._process_ofb, blocks, self.iv)
 
     async def decrypt_ofb_async(self, blocks: List[bytes]) -> List[bytes]:
         return await self.encrypt_ofb_async(blocks)
 
     async def encrypt_random_delta_async(self, blocks: List[bytes]) -> List[bytes]:
-        counters = self._generate_counters(len(blocks))
-        
-        async def process_block(counter, block):
-            delta = self._generate_delta(counter)
-            modified_counter = xor_bytes(counter, delta)
-            
-            if hasattr(self.cipher, 'encrypt_block_async'):
-                keystream = await self.cipher.encrypt_block_async(modified_counter)
-            else:
-                keystream = self.cipher.encrypt_block(modified_counter)
-            
-            return xor_bytes(block, keystream)
-        
-        return await asyncio.gather(*[process_block(counter, block) for counter, block in zip(counters, blocks)])
+        return await self._process_parallel(blocks, True)
 
     async def decrypt_random_delta_async(self, blocks: List[bytes]) -> List[bytes]:
         return await self.encrypt_random_delta_async(blocks)
 
     def _process_ecb(self, blocks: List[bytes], encrypt: bool) -> List[bytes]:
-        method = self.cipher.encrypt_block if encrypt else self.cipher.decrypt_block
-        return [method(block) for block in blocks]
-
-    def _process_cbc(self, blocks: List[bytes], encrypt: bool) -> List[bytes]:
+        if self._ecb_memos is not None:
+            return self._ecb_memos[encrypt].process(blocks, lambda missing: self._cipher_blocks(missing, encrypt))
+        return self._cipher_blocks(blocks, encrypt)
+
+    def _cipher_method(self, encrypt: bool):
+        method = getattr(self.cipher, 'encrypt_blocks' if encrypt else 'decrypt_blocks', None)
+        if method is not None:
+            return method
+        
+        # Шифр только с поблочным API: общий цикл по блокам из ISymmetricCipher
+        loop = ISymmetricCipher.encrypt_blocks if encrypt else ISymmetricCipher.decrypt_blocks
+        return lambda buf, out: loop(self.cipher, buf, out)
+
+    def _cipher_buffer(self, data, encrypt: bool) -> bytearray:
+        out = bytearray(len(data))
+        method = self._cipher_method(encrypt)
+        with self.timer('cipher'):
+            method(memoryview(data), memoryview(out))
+        return out
+
+    def _cipher_blocks(self, blocks: List[bytes], encrypt: bool) -> List[bytes]:
+        return split_blocks(bytes(self._cipher_buffer(join_blocks(blocks), encrypt)), self.block_size)
+
+    def _xor_block_lists(self, left: List[bytes], right: List[bytes]) -> List[bytes]:
+        # Один XOR по всему буферу вместо отдельного XOR на каждый блок
+        if not left:
+            return []
+        
+        with self.timer('xor'):
+            xored = xor_bytes(join_blocks(left), join_blocks(right))
+        return split_blocks(xored, self.block_size)
+
+    def _xor_keystream(self, blocks: List[bytes], keystream: bytes) -> List[bytes]:
+        with self.timer('xor'):
+            xored = xor_bytes(join_blocks(blocks), keystream)
+        return split_blocks(xored, self.block_size)
+
+    def _process_cbc(self, blocks: List[bytes], encrypt: bool, iv: bytes) -> List[bytes]:
         result = []
-        prev = self.iv
+        prev = iv
         
         if encrypt:
             for block in blocks:
@@ -210,17 +688,16 @@ class CryptoContext:
                 result.append(encrypted)
                 prev = encrypted
         else:
-            for block in blocks:
-                decrypted = self.cipher.decrypt_block(block)
-                plaintext = xor_bytes(decrypted, prev)
-                result.append(plaintext)
-                prev = block
+            # Каждый открытый блок зависит только от двух блоков шифртекста,
+            # поэтому все блоки расшифровываются одним пакетом
+            decrypted = self._cipher_blocks(blocks, False)
+            result = self._xor_block_lists(decrypted, [prev] + blocks[:-1])
         
         return result
 
-    def _process_pcbc(self, blocks: List[bytes], encrypt: bool) -> List[bytes]:
+    def _process_pcbc(self, blocks: List[bytes], encrypt: bool, iv: bytes) -> List[bytes]:
         result = []
-        feedback = self.iv
+        feedback = iv
         
         if encrypt:
             for block in blocks:
@@ -229,59 +706,69 @@ class CryptoContext:
                 result.append(encrypted)
                 feedback = xor_bytes(block, encrypted)
         else:
-            for block in blocks:
-                decrypted = self.cipher.decrypt_block(block)
+            # Расшифрование блоков от цепочки не зависит, последовательны только XOR
+            for block, decrypted in zip(blocks, self._cipher_blocks(blocks, False)):
                 plaintext = xor_bytes(decrypted, feedback)
                 result.append(plaintext)
                 feedback = xor_bytes(plaintext, block)
         
         return result
 
-    def _process_cfb(self, blocks: List[bytes], encrypt: bool) -> List[bytes]:
+    def _process_cfb(self, blocks: List[bytes], encrypt: bool, iv: bytes) -> List[bytes]:
+        if not encrypt:
+            keystreams = self._cipher_blocks([iv] + blocks[:-1], True)
+            return self._xor_block_lists(blocks, keystreams)
+
         result = []
-        shift_register = self.iv
+        shift_register = iv
         
         for block in blocks:
             keystream = self.cipher.encrypt_block(shift_register)
             processed = xor_bytes(block, keystream)
             result.append(processed)
-            shift_register = processed if encrypt else block
+            shift_register = processed
         
         return result
 
-    def _process_ofb(self, blocks: List[bytes]) -> List[bytes]:
-        result = []
-        keystream = self.iv
+    def _process_ofb(self, blocks: List[bytes], iv: bytes) -> List[bytes]:
+        # Поток ключей от данных не зависит: сначала он строится целиком, затем один XOR
+        keystream = self.ofb_keystream(iv, len(blocks))
+        return self._xor_keystream(blocks, keystream)
+
+    def ofb_keystream(self, iv: bytes, count: int) -> bytes:
+        if hasattr(self.cipher, 'encrypt_block_permuted_int'):
+            return self._ofb_keystream_permuted(iv, count)
+
+        keystreams = []
+        keystream = iv
         
-        for block in blocks:
+        for _ in range(count):
             keystream = self.cipher.encrypt_block(keystream)
-            result.append(xor_bytes(block, keystream))
+            keystreams.append(keystream)
         
-        return result
+        return join_blocks(keystreams)
 
-    def _process_ctr(self, blocks: List[bytes]) -> List[bytes]:
-        result = []
-        counter = self.iv
+    def _ofb_keystream_permuted(self, iv: bytes, count: int) -> bytes:
+        # Поток ключей OFB сцепляется сам с собой, поэтому состояние держим
+        # в пространстве после IP и переводим обратно только для XOR с данными
+        keystreams = []
+        state = int.from_bytes(self.cipher.to_permuted(iv), 'big')
         
-        for block in blocks:
-            keystream = self.cipher.encrypt_block(counter)
-            result.append(xor_bytes(block, keystream))
-            counter = self._increment_counter(counter)
+        for _ in range(count):
+            state = self.cipher.encrypt_block_permuted_int(state)
+            keystreams.append(self.cipher.from_permuted(state.to_bytes(self.block_size, 'big')))
         
-        return result
+        return join_blocks(keystreams)
 
-    def _process_random_delta(self, blocks: List[bytes]) -> List[bytes]:
-        result = []
-        counter = self.iv
+    def _process_ctr(self, blocks: List[bytes], iv: bytes) -> List[bytes]:
+        keystream = self._cipher_buffer(counter_blocks(iv, 0, len(blocks)), True)
         
-        for block in blocks:
-            delta = self._generate_delta(counter)
-            modified_counter = xor_bytes(counter, delta)
-            keystream = self.cipher.encrypt_block(modified_counter)
-            result.append(xor_bytes(block, keystream))
-            counter = self._increment_counter(counter)
+        return self._xor_keystream(blocks, keystream)
+
+    def _process_random_delta(self, blocks: List[bytes], iv: bytes) -> List[bytes]:
+        keystream = self._cipher_buffer(self._random_delta_counters(len(blocks), iv), True)
         
-        return result
+        return self._xor_keystream(blocks, keystream)
 
     def encrypt_ecb(self, blocks: List[bytes]) -> List[bytes]:
         return self._process_ecb(blocks, True)
@@ -289,68 +776,59 @@ class CryptoContext:
     def decrypt_ecb(self, blocks: List[bytes]) -> List[bytes]:
         return self._process_ecb(blocks, False)
 
-    def encrypt_cbc(self, blocks: List[bytes]) -> List[bytes]:
-        return self._process_cbc(blocks, True)
+    def encrypt_cbc(self, blocks: List[bytes], iv: Optional[bytes] = None) -> List[bytes]:
+        return self._process_cbc(blocks, True, iv or self.iv)
 
-    def decrypt_cbc(self, blocks: List[bytes]) -> List[bytes]:
-        return self._process_cbc(blocks, False)
+    def decrypt_cbc(self, blocks: List[bytes], iv: Optional[bytes] = None) -> List[bytes]:
+        return self._process_cbc(blocks, False, iv or self.iv)
 
-    def encrypt_pcbc(self, blocks: List[bytes]) -> List[bytes]:
-        return self._process_pcbc(blocks, True)
+    def encrypt_pcbc(self, blocks: List[bytes], iv: Optional[bytes] = None) -> List[bytes]:
+        return self._process_pcbc(blocks, True, iv or self.iv)
 
-    def decrypt_pcbc(self, blocks: List[bytes]) -> List[bytes]:
-        return self._process_pcbc(blocks, False)
+    def decrypt_pcbc(self, blocks: List[bytes], iv: Optional[bytes] = None) -> List[bytes]:
+        return self._process_pcbc(blocks, False, iv or self.iv)
 
-    def encrypt_cfb(self, blocks: List[bytes]) -> List[bytes]:
-        return self._process_cfb(blocks, True)
+    def encrypt_cfb(self, blocks: List[bytes], iv: Optional[bytes] = None) -> List[bytes]:
+        return self._process_cfb(blocks, True, iv or self.iv)
 
-    def decrypt_cfb(self, blocks: List[bytes]) -> List[bytes]:
-        return self._process_cfb(blocks, False)
+    def decrypt_cfb(self, blocks: List[bytes], iv: Optional[bytes] = None) -> List[bytes]:
+        return self._process_cfb(blocks, False, iv or self.iv)
 
-    def encrypt_ofb(self, blocks: List[bytes]) -> List[bytes]:
-        return self._process_ofb(blocks)
+    def encrypt_ofb(self, blocks: List[bytes], iv: Optional[bytes] = None) -> List[bytes]:
+        return self._process_ofb(blocks, iv or self.iv)
 
-    def decrypt_ofb(self, blocks: List[bytes]) -> List[bytes]:
-        return self._process_ofb(blocks)
+    def decrypt_ofb(self, blocks: List[bytes], iv: Optional[bytes] = None) -> List[bytes]:
+        return self._process_ofb(blocks, iv or self.iv)
 
-    def encrypt_ctr(self, blocks: List[bytes]) -> List[bytes]:
-        return self._process_ctr(blocks)
+    def encrypt_ctr(self, blocks: List[bytes], iv: Optional[bytes] = None) -> List[bytes]:
+        return self._process_ctr(blocks, iv or self.iv)
 
-    def decrypt_ctr(self, blocks: List[bytes]) -> List[bytes]:
-        return self._process_ctr(blocks)
+    def decrypt_ctr(self, blocks: List[bytes], iv: Optional[bytes] = None) -> List[bytes]:
+        return self._process_ctr(blocks, iv or self.iv)
 
-    def encrypt_random_delta(self, blocks: List[bytes]) -> List[bytes]:
-        return self._process_random_delta(blocks)
+    def encrypt_random_delta(self, blocks: List[bytes], iv: Optional[bytes] = None) -> List[bytes]:
+        return self._process_random_delta(blocks, iv or self.iv)
 
-    def decrypt_random_delta(self, blocks: List[bytes]) -> List[bytes]:
-        return self._process_random_delta(blocks)
+    def decrypt_random_delta(self, blocks: List[bytes], iv: Optional[bytes] = None) -> List[bytes]:
+        return self._process_random_delta(blocks, iv or self.iv)
 
-    def _generate_counters(self, count: int) -> List[bytes]:
-        counters = []
-        current_counter = self.iv
-        
-        for _ in range(count):
-            counters.append(current_counter)
-            current_counter = self._increment_counter(current_counter)
-        
-        return counters
+    def _generate_counters(self, count: int, iv: Optional[bytes] = None, start: int = 0) -> List[bytes]:
+        return split_blocks(counter_blocks(iv or self.iv, start, count), self.block_size)
 
-    def _generate_delta(self, counter: bytes) -> bytes:
-        delta = bytearray(len(counter))
-        
-        for i, c in enumerate(counter):
-            delta[i] = (c * 17 + i * 13) % 256
-        
-        return bytes(delta)
+    def _mode_counters(self, count: int, iv: Optional[bytes] = None) -> List[bytes]:
+        if self.mode == CipherMode.RANDOM_DELTA:
+            return split_blocks(self._random_delta_counters(count, iv), self.block_size)
+        return self._generate_counters(count, iv)
 
-    def _increment_counter(self, counter: bytes) -> bytes:
-        arr = bytearray(counter)
+    def _counter_at(self, index: int, iv: Optional[bytes] = None) -> bytes:
+        return counter_value(iv or self.iv, index)
+
+    def _random_delta_counters(self, count: int, iv: Optional[bytes] = None, start: int = 0) -> bytes:
+        # counter xor delta зависит только от байта и его позиции в блоке, поэтому
+        # каждая позиция всех счетчиков пакета преобразуется одной таблицей
+        counters = bytearray(counter_blocks(iv or self.iv, start, count))
         
-        for i in range(len(arr) - 1, -1, -1):
-            if arr[i] == 0xFF:
-                arr[i] = 0
-            else:
-                arr[i] += 1
-                break
+        for position, table in enumerate(_random_delta_tables(self.block_size)):
+            counters[position::self.block_size] = counters[position::self.block_size].translate(table)
         
-        return bytes(arr)
\ No newline at end of file
+        return bytes(counters)
@@ -4,6 +4,7 @@ from src.DES.DESCipher import DESCipher
 from src.DES.DESKeyExpansion import DESKeyExpansion
 from src.DEAL.DEALKeyExpansion import DEALKeyExpansion
 from src.DEAL.DEALEncryptor import DEALEncryptor
+from src.DEAL.DEALEngine import DEALEngine
 import asyncio
 
 
@@ -18,6 +19,10 @@ class DESAdapter(IDESAdapter):
     def block_size(self) -> int:
         return 8
 
+    @property
+    def round_keys(self) -> list:
+        return self.des.round_keys
+
     def encrypt_block(self, block: bytes) -> bytes:
         return self.des.encrypt_block(block)
 
@@ -45,6 +50,8 @@ class DEALCipher(FeistelNetwork, ISymmetricCipher):
         block_size = 16
         rounds = 6 if key_size == 16 else 8
 
+        # Вложенный DES использует то же расписание, что уже выработал адаптер
+        self.engine = DEALEngine(des_adapter.round_keys)
         super().__init__(
             key_expansion=key_expansion,
             encryptor=encryptor,
@@ -59,6 +66,13 @@ class DEALCipher(FeistelNetwork, ISymmetricCipher):
     def key_size_info(self) -> str:
         return f'DEAL-{self.key_size * 8}'
 
+    # Раундовый ключ DEAL хранится уже внесенным в подключи вложенного DES
+    def _prepare_round_key(self, round_key: bytes) -> tuple:
+        return self.engine.fold_round_key(round_key)
+
+    def _crypt_int(self, block: int, keys: list) -> int:
+        return self.engine.process(block, keys)
+
     async def encrypt_block_async(self, block: bytes) -> bytes:
         return await asyncio.to_thread(self.encrypt_block, block)
 
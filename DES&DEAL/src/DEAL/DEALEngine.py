@@ -0,0 +1,63 @@
+from src.DES.DESTableEncryptor import SP_TABLES
+from src.utils.bit_utils import compile_permutation
+from src.utils.constants import DESConstants, BitOrder
+
+
+IP = compile_permutation(DESConstants.IP, BitOrder.MSB, start_at_zero=False)
+IP_INV = compile_permutation(DESConstants.IP_INV, BitOrder.MSB, start_at_zero=False)
+EXPANSION = compile_permutation(DESConstants.E, BitOrder.LSB, start_at_zero=False)
+
+HALF_MASK = (1 << 32) - 1
+BLOCK_MASK = (1 << 64) - 1
+
+
+class DEALEngine:
+    # Раунды DEAL целиком в пространстве после IP: вложенный DES работает
+    # с целыми числами, а XOR с раундовым ключом DEAL заранее внесен в подключи DES
+    def __init__(self, des_round_keys: list):
+        self.des_keys = [int.from_bytes(round_key, 'big') for round_key in des_round_keys]
+
+    @staticmethod
+    def expand(half: int) -> int:
+        return EXPANSION(half)
+
+    def fold_round_key(self, round_key: bytes) -> tuple:
+        # DES(x ^ K) после IP: IP(K) = Kl | Kr сдвигает на Kr все четные половины
+        # состояния и на Kl все нечетные. E линейна, поэтому сдвиг входа раунда
+        # переносится в подключ, а сдвиг выхода снимается маской Kr | Kl
+        permuted = IP(int.from_bytes(round_key, 'big'))
+        left, right = permuted >> 32, permuted & HALF_MASK
+        expanded = (self.expand(right), self.expand(left))
+
+        subkeys = tuple(key ^ expanded[index % 2] for index, key in enumerate(self.des_keys))
+        return subkeys, (right << 32) | left
+
+    @staticmethod
+    def des_rounds(block: int, subkeys: tuple) -> int:
+        (s0, e0), (s1, e1), (s2, e2), (s3, e3) = EXPANSION.tables
+        sp0, sp1, sp2, sp3, sp4, sp5, sp6, sp7 = SP_TABLES
+
+        L = block >> 32
+        R = block & HALF_MASK
+        for subkey in subkeys:
+            mixed = (
+                e0[R >> s0] | e1[(R >> s1) & 0xFF] | e2[(R >> s2) & 0xFF] | e3[(R >> s3) & 0xFF]
+            ) ^ subkey
+            L, R = R, L ^ (
+                sp0[(mixed >> 42) & 0x3F] | sp1[(mixed >> 36) & 0x3F] |
+                sp2[(mixed >> 30) & 0x3F] | sp3[(mixed >> 24) & 0x3F] |
+                sp4[(mixed >> 18) & 0x3F] | sp5[(mixed >> 12) & 0x3F] |
+                sp6[(mixed >> 6) & 0x3F] | sp7[mixed & 0x3F]
+            )
+
+        return (R << 32) | L
+
+    def process(self, block: int, keys: list) -> int:
+        des_rounds = self.des_rounds
+
+        L = IP(block >> 64)
+        R = IP(block & BLOCK_MASK)
+        for subkeys, mask in keys:
+            L, R = R, L ^ mask ^ des_rounds(R, subkeys)
+
+        return (IP_INV(R) << 64) | IP_INV(L)
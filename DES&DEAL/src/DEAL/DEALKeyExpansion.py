@@ -1,12 +1,14 @@
 from typing import List
-from src.interfaces import IKeyExpansion
 from src.utils.bit_utils import xor_bytes
 from src.DES.DESCipher import DESCipher
 from src.DES.DESKeyExpansion import DESKeyExpansion
+from src.utils.key_cache import CachedKeyExpansion, KeyScheduleCache
 
 
-class DEALKeyExpansion(IKeyExpansion):
-    def generate_round_keys(self, key_bytes: bytes) -> List[bytes]:
+class DEALKeyExpansion(CachedKeyExpansion):
+    cache = KeyScheduleCache(maxsize=256)
+
+    def expand_key(self, key_bytes: bytes) -> List[bytes]:
         key_size = len(key_bytes)
         rounds = 6 if key_size == 16 else 8
         
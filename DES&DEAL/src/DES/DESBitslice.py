@@ -0,0 +1,170 @@
+from typing import List
+from src.utils.constants import DESConstants
+
+
+def _flip(index: int) -> int:
+    # Перевод номера бита между порядками LSB и MSB внутри одного байта
+    return 8 * (index // 8) + 7 - index % 8
+
+
+# Номера битов везде даны в порядке MSB: бит i - это бит (7 - i % 8) байта i // 8
+IP_PLANES = [pos - 1 for pos in DESConstants.IP]
+IP_INV_PLANES = [pos - 1 for pos in DESConstants.IP_INV]
+E_PLANES = [_flip(DESConstants.E[_flip(m)] - 1) for m in range(48)]
+P_PLANES = [_flip(DESConstants.P[_flip(u)] - 1) for u in range(32)]
+
+
+def _build_sbox_circuits() -> list:
+    # Каждый выход S-блока раскладывается по 16 минтермам столбца (x1..x4);
+    # при минтерме стоит функция строки (x0, x5), заданная таблицей истинности
+    circuits = []
+    for s_box in DESConstants.S:
+        outputs = []
+        for t in range(4):
+            terms = []
+            for col in range(16):
+                truth_table = 0
+                for row in range(4):
+                    if (s_box[row][col] >> (3 - t)) & 1:
+                        truth_table |= 1 << row
+                if truth_table:
+                    terms.append((col, truth_table))
+            outputs.append(tuple(terms))
+        circuits.append(tuple(outputs))
+
+    return circuits
+
+
+SBOX_CIRCUITS = _build_sbox_circuits()
+
+
+def _pairs(a, na, b, nb) -> tuple:
+    return (na & nb, na & b, a & nb, a & b)
+
+
+def _sbox(circuit, x, nx, ones) -> list:
+    cols_hi = _pairs(x[1], nx[1], x[2], nx[2])
+    cols_lo = _pairs(x[3], nx[3], x[4], nx[4])
+    rows = _pairs(x[0], nx[0], x[5], nx[5])
+
+    row_functions = {15: ones}
+    result = []
+    for terms in circuit:
+        value = 0
+        for col, truth_table in terms:
+            function = row_functions.get(truth_table)
+            if function is None:
+                function = 0
+                for row in range(4):
+                    if truth_table >> row & 1:
+                        function |= rows[row]
+                row_functions[truth_table] = function
+            value |= cols_hi[col >> 2] & cols_lo[col & 3] & function
+        result.append(value)
+
+    return result
+
+
+class DESBitsliceEngine:
+    # Меньше этого числа блоков побитовый срез медленнее поблочного шифрования
+    min_blocks = 48
+    batch_blocks = 1 << 17
+
+    def __init__(self, round_keys: List[bytes]):
+        self.round_keys = [self._key_bits(round_key) for round_key in round_keys]
+
+    @staticmethod
+    def _key_bits(round_key: bytes) -> list:
+        value = int.from_bytes(round_key, 'big')
+        return [(value >> (47 - m)) & 1 for m in range(48)]
+
+    def encrypt(self, data: bytes) -> bytes:
+        return self._process(data, self.round_keys)
+
+    def decrypt(self, data: bytes) -> bytes:
+        return self._process(data, self.round_keys[::-1])
+
+    def _process(self, data: bytes, round_keys: list) -> bytes:
+        if len(data) % 8 != 0:
+            raise ValueError("Размер данных должен быть кратен размеру блока DES (8 байт)")
+
+        batch_size = self.batch_blocks * 8
+        return b''.join(
+            self._process_batch(data[start:start + batch_size], round_keys)
+            for start in range(0, len(data), batch_size)
+        )
+
+    def _process_batch(self, data: bytes, round_keys: list) -> bytes:
+        blocks = len(data) // 8
+        lanes = (blocks + 7) // 8
+        data = bytes(data) + bytes(lanes * 64 - len(data))
+
+        planes = self._to_planes(data, lanes)
+        ones = (1 << (lanes * 8)) - 1
+        state = [planes[i] for i in IP_PLANES]
+        state = self._rounds(state, round_keys, ones)
+        planes = [state[i] for i in IP_INV_PLANES]
+
+        return self._from_planes(planes, lanes)[:blocks * 8]
+
+    def _rounds(self, state: list, round_keys: list, ones: int) -> list:
+        L = state[:32]
+        R = state[32:]
+
+        for key_bits in round_keys:
+            x = []
+            nx = []
+            for m in range(48):
+                bit = R[E_PLANES[m]]
+                if key_bits[m]:
+                    x.append(bit ^ ones)
+                    nx.append(bit)
+                else:
+                    x.append(bit)
+                    nx.append(bit ^ ones)
+
+            s_output = []
+            for s_index in range(8):
+                lo = s_index * 6
+                s_output.extend(_sbox(SBOX_CIRCUITS[s_index], x[lo:lo + 6], nx[lo:lo + 6], ones))
+
+            L, R = R, [L[u] ^ s_output[P_PLANES[u]] for u in range(32)]
+
+        return R + L
+
+    # Блоки делятся на 8 групп по lanes штук; блок n группы g занимает
+    # бит 8 * n + g в каждой битовой плоскости
+    def _to_planes(self, data: bytes, lanes: int) -> list:
+        group_size = lanes * 8
+        mask = int.from_bytes(b'\x01' * lanes, 'little')
+
+        columns = []
+        for group in range(8):
+            chunk = data[group * group_size:(group + 1) * group_size]
+            columns.append([int.from_bytes(chunk[k::8], 'little') for k in range(8)])
+
+        planes = []
+        for i in range(64):
+            byte_index, shift = i // 8, 7 - i % 8
+            plane = 0
+            for group in range(8):
+                plane |= ((columns[group][byte_index] >> shift) & mask) << group
+            planes.append(plane)
+
+        return planes
+
+    def _from_planes(self, planes: list, lanes: int) -> bytes:
+        group_size = lanes * 8
+        mask = int.from_bytes(b'\x01' * lanes, 'little')
+        result = bytearray(group_size * 8)
+
+        for group in range(8):
+            chunk = bytearray(group_size)
+            for byte_index in range(8):
+                column = 0
+                for bit in range(8):
+                    column |= ((planes[byte_index * 8 + 7 - bit] >> group) & mask) << bit
+                chunk[byte_index::8] = column.to_bytes(lanes, 'little')
+            result[group * group_size:(group + 1) * group_size] = chunk
+
+        return bytes(result)
@@ -1,16 +1,22 @@
 from src.FeistelNetwork import FeistelNetwork
 from src.DES.DESKeyExpansion import DESKeyExpansion
-from src.DES.DESEncryptor import DESEncryptor
+from src.DES.DESTableEncryptor import DESTableEncryptor
+from src.DES.DESBitslice import DESBitsliceEngine
+from src.DES.DESNumpy import DESNumpyEngine, numpy_available
 from src.interfaces import ISymmetricCipher
-from src.utils.bit_utils import permutation
-from src.utils.constants import DESConstants, BitOrder
+from src.utils.bit_utils import compile_permutation
+from src.utils.constants import DESConstants, BitOrder, BatchBackend
 import asyncio
 
 
+IP = compile_permutation(DESConstants.IP, BitOrder.MSB, start_at_zero=False)
+IP_INV = compile_permutation(DESConstants.IP_INV, BitOrder.MSB, start_at_zero=False)
+
+
 class DESCipher(FeistelNetwork, ISymmetricCipher):
-    def __init__(self, master_key: bytes = None):
+    def __init__(self, master_key: bytes = None, backend: BatchBackend = BatchBackend.AUTO):
         key_expansion = DESKeyExpansion()
-        encryptor = DESEncryptor()
+        encryptor = DESTableEncryptor()
         super().__init__(
             key_expansion=key_expansion,
             encryptor=encryptor,
@@ -18,16 +24,50 @@ class DESCipher(FeistelNetwork, ISymmetricCipher):
             block_size=8,
             rounds=16
         )
+        self.backend = backend
+        self._batch_engine = None
+
+    def _crypt_int(self, block: int, keys: list) -> int:
+        return IP_INV(self._process_block_int(IP(block), keys))
+
+    def to_permuted(self, block: bytes) -> bytes:
+        return IP.apply(block)
+
+    def from_permuted(self, block: bytes) -> bytes:
+        return IP_INV.apply(block)
+
+    # Для цепочек вроде OFB состояние держится после IP, без перестановок на каждом блоке
+    def encrypt_block_permuted_int(self, block: int) -> int:
+        return self._process_block_int(block, self._round_keys_for(False))
+
+    def _get_batch_engine(self):
+        if self.backend == BatchBackend.BLOCK:
+            return None
+        if not self.round_keys:
+            raise ValueError("Не установлен мастер-ключ или раундовые ключи")
+
+        if self._batch_engine is None:
+            use_numpy = self.backend == BatchBackend.NUMPY or (
+                self.backend == BatchBackend.AUTO and numpy_available()
+            )
+            engine_class = DESNumpyEngine if use_numpy else DESBitsliceEngine
+            self._batch_engine = engine_class(self.round_keys)
+        return self._batch_engine
+
+    def _process_blocks(self, buf, out, decrypt: bool):
+        engine = self._get_batch_engine()
+        if engine is None or len(buf) < engine.min_blocks * 8:
+            return super()._process_blocks(buf, out, decrypt)
 
-    def encrypt_block(self, block: bytes) -> bytes:
-        block = permutation(block, DESConstants.IP, start_at_zero=False, bit_order=BitOrder.MSB)
-        result = super().encrypt_block(block)
-        return permutation(result, DESConstants.IP_INV, start_at_zero=False, bit_order=BitOrder.MSB)
+        self._validate_buffers(buf, out)
+        if self._stats is not None:
+            self._count('blocks', len(buf) // 8)
+        method = engine.decrypt if decrypt else engine.encrypt
+        out[:len(buf)] = method(buf)
 
-    def decrypt_block(self, block: bytes) -> bytes:
-        block = permutation(block, DESConstants.IP, start_at_zero=False, bit_order=BitOrder.MSB)
-        result = super().decrypt_block(block)
-        return permutation(result, DESConstants.IP_INV, start_at_zero=False, bit_order=BitOrder.MSB)
+    def set_round_keys(self, round_keys: list):
+        super().set_round_keys(round_keys)
+        self._batch_engine = None
 
     async def encrypt_block_async(self, block: bytes) -> bytes:
         return await asyncio.to_thread(self.encrypt_block, block)
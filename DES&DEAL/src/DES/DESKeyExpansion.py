@@ -1,29 +1,33 @@
 from typing import List
-from src.interfaces import IKeyExpansion
 from src.utils.constants import DESConstants, BitOrder
-from src.utils.bit_utils import permutation, rotate_left, bits_to_bytes, bytes_to_bits
+from src.utils.bit_utils import compile_permutation
+from src.utils.key_cache import CachedKeyExpansion, KeyScheduleCache
 
 
-class DESKeyExpansion(IKeyExpansion):
-    def generate_round_keys(self, key: bytes) -> List[bytes]:
+PC1 = compile_permutation(DESConstants.PC1, BitOrder.LSB, start_at_zero=False)
+PC2 = compile_permutation(DESConstants.PC2, BitOrder.LSB, start_at_zero=False)
+HALF_MASK = (1 << 28) - 1
+
+
+class DESKeyExpansion(CachedKeyExpansion):
+    cache = KeyScheduleCache(maxsize=256)
+
+    def expand_key(self, key: bytes) -> List[bytes]:
         if len(key) != 8:
             raise ValueError("Некорректный размер исходного ключа. Ожидается, что он равен 8 байтам")
 
-        permuted = permutation(key, DESConstants.PC1, start_at_zero=False)
-        permuted_bits = bytes_to_bits(permuted, BitOrder.MSB)
+        permuted = PC1(int.from_bytes(key, 'big'))
 
-        c = permuted_bits[:28]
-        d = permuted_bits[28:56]
+        c = permuted >> 28
+        d = permuted & HALF_MASK
 
         round_keys = []
         for i in range(16):
-            c = rotate_left(c, DESConstants.SHIFTS[i])
-            d = rotate_left(d, DESConstants.SHIFTS[i])
-
-            cd_bits = c + d
-            cd_bytes = bits_to_bytes(cd_bits, BitOrder.MSB)  
+            shift = DESConstants.SHIFTS[i]
+            c = ((c << shift) | (c >> (28 - shift))) & HALF_MASK
+            d = ((d << shift) | (d >> (28 - shift))) & HALF_MASK
 
-            round_key = permutation(cd_bytes, DESConstants.PC2, start_at_zero=False)
-            round_keys.append(round_key)
+            round_key = PC2((c << 28) | d)
+            round_keys.append(round_key.to_bytes(6, 'big'))
 
-        return round_keys
\ No newline at end of file
+        return round_keys
@@ -0,0 +1,92 @@
+from typing import List
+from src.DES.DESTableEncryptor import SP_TABLES
+from src.utils.bit_utils import compile_permutation
+from src.utils.constants import DESConstants, BitOrder
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Массивы такого размера вместе с временными буферами помещаются в кэш процессора
+CHUNK_BLOCKS = 8192
+
+
+def numpy_available() -> bool:
+    return np is not None
+
+
+class DESNumpyEngine:
+    min_blocks = 16
+
+    def __init__(self, round_keys: List[bytes]):
+        if np is None:
+            raise ImportError("Для DESNumpyEngine требуется пакет numpy")
+
+        self.round_keys = [np.uint64(int.from_bytes(round_key, 'big')) for round_key in round_keys]
+        self.ip = self._lookup_tables(DESConstants.IP, BitOrder.MSB)
+        self.ip_inv = self._lookup_tables(DESConstants.IP_INV, BitOrder.MSB)
+        self.expansion = self._lookup_tables(DESConstants.E, BitOrder.LSB)
+        self.sp_tables = [
+            (np.uint64(42 - 6 * s_index), np.array(table, dtype=np.uint64))
+            for s_index, table in enumerate(SP_TABLES)
+        ]
+
+    @staticmethod
+    def _lookup_tables(table: list, bit_order: BitOrder) -> list:
+        compiled = compile_permutation(table, bit_order, start_at_zero=False)
+        return [(np.uint64(shift), np.array(lookup, dtype=np.uint64)) for shift, lookup in compiled.tables]
+
+    def encrypt(self, data: bytes) -> bytes:
+        return self._process(data, self.round_keys)
+
+    def decrypt(self, data: bytes) -> bytes:
+        return self._process(data, self.round_keys[::-1])
+
+    def _process(self, data: bytes, round_keys: list) -> bytes:
+        if len(data) % 8 != 0:
+            raise ValueError("Размер данных должен быть кратен размеру блока DES (8 байт)")
+
+        blocks = np.frombuffer(data, dtype='>u8').astype(np.uint64)
+        for start in range(0, len(blocks), CHUNK_BLOCKS):
+            chunk = blocks[start:start + CHUNK_BLOCKS]
+            chunk[:] = self._process_chunk(chunk, round_keys)
+
+        return blocks.astype('>u8').tobytes()
+
+    def _process_chunk(self, blocks, round_keys: list):
+        index = np.empty_like(blocks)
+        gathered = np.empty_like(blocks)
+        mixed = np.empty_like(blocks)
+
+        blocks = self._gather(blocks, self.ip, 0xFF, index, gathered, np.zeros_like(blocks))
+
+        L = blocks >> np.uint64(32)
+        R = blocks & np.uint64(0xFFFFFFFF)
+        f_result = np.empty_like(blocks)
+
+        for round_key in round_keys:
+            mixed.fill(0)
+            self._gather(R, self.expansion, 0xFF, index, gathered, mixed)
+            mixed ^= round_key
+
+            f_result.fill(0)
+            self._gather(mixed, self.sp_tables, 0x3F, index, gathered, f_result)
+            L ^= f_result
+            L, R = R, L
+
+        R <<= np.uint64(32)
+        R |= L
+        return self._gather(R, self.ip_inv, 0xFF, index, gathered, np.zeros_like(R))
+
+    @staticmethod
+    def _gather(source, tables: list, mask: int, index, gathered, out):
+        mask = np.uint64(mask)
+        for shift, table in tables:
+            np.right_shift(source, shift, out=index)
+            np.bitwise_and(index, mask, out=index)
+            np.take(table, index, out=gathered)
+            out |= gathered
+
+        return out
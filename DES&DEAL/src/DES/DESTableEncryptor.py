@@ -0,0 +1,82 @@
+import asyncio
+from src.interfaces import IEncryptor
+from src.utils.constants import DESConstants
+from src.utils.bit_utils import permutation
+
+
+def _bit_position(index: int, size: int) -> int:
+    # Позиция бита с номером index (порядок LSB внутри байта) в целом числе big-endian из size байт
+    return (size - 1 - index // 8) * 8 + index % 8
+
+
+def _build_expansion_shifts() -> list:
+    groups = {}
+    for out_index, in_index in enumerate(DESConstants.E):
+        out_pos = _bit_position(out_index, 6)
+        in_pos = _bit_position(in_index - 1, 4)
+        shift = out_pos - in_pos
+        groups[shift] = groups.get(shift, 0) | (1 << out_pos)
+
+    return sorted(groups.items())
+
+
+def _build_sp_tables() -> list:
+    tables = []
+    for s_index in range(8):
+        table = []
+        for value in range(64):
+            row = ((value >> 4) & 0b10) | (value & 1)
+            col = (value >> 1) & 0xF
+            four_bit_value = DESConstants.S[s_index][row][col]
+
+            s_output = (four_bit_value << (28 - 4 * s_index)).to_bytes(4, 'big')
+            p_output = permutation(s_output, DESConstants.P, start_at_zero=False)
+            table.append(int.from_bytes(p_output, 'big'))
+        tables.append(tuple(table))
+
+    return tables
+
+
+EXPANSION_SHIFTS = _build_expansion_shifts()
+SP_TABLES = _build_sp_tables()
+
+
+class DESTableEncryptor(IEncryptor):
+    def expand(self, block: int) -> int:
+        result = 0
+        for shift, mask in EXPANSION_SHIFTS:
+            if shift >= 0:
+                result |= (block << shift) & mask
+            else:
+                result |= (block >> -shift) & mask
+
+        return result
+
+    def prepare_round_key(self, round_key: bytes) -> int:
+        return int.from_bytes(round_key, 'big')
+
+    def Feistel_function_int(self, input_block: int, round_key: int, half_size: int = 4) -> int:
+        sp0, sp1, sp2, sp3, sp4, sp5, sp6, sp7 = SP_TABLES
+        mixed = self.expand(input_block) ^ round_key
+
+        return (
+            sp0[(mixed >> 42) & 0x3F] | sp1[(mixed >> 36) & 0x3F] |
+            sp2[(mixed >> 30) & 0x3F] | sp3[(mixed >> 24) & 0x3F] |
+            sp4[(mixed >> 18) & 0x3F] | sp5[(mixed >> 12) & 0x3F] |
+            sp6[(mixed >> 6) & 0x3F] | sp7[mixed & 0x3F]
+        )
+
+    def Feistel_function(self, input_block: bytes, round_key: bytes) -> bytes:
+        if len(input_block) != 4:
+            raise ValueError('Некорректный размер входного блока данных. Ожидается, что размер равен 4 байтам')
+        if len(round_key) != 6:
+            raise ValueError('Некорректный размер раундового ключа. Ожидается, что размер равен 6 байтам')
+
+        result = self.Feistel_function_int(
+            int.from_bytes(input_block, 'big'),
+            int.from_bytes(round_key, 'big')
+        )
+        return result.to_bytes(4, 'big')
+
+    async def Feistel_function_async(self, input_block, round_key):
+        return await asyncio.to_thread(self.Feistel_function, input_block, round_key)
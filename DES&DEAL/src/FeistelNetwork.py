@@ -1,8 +1,10 @@
 from src.interfaces import IFeistelNetwork, ISymmetricCipher, IEncryptor, IKeyExpansion
-from src.utils.bit_utils import xor_bytes
 
 
 class FeistelNetwork(IFeistelNetwork, ISymmetricCipher):
+    # Необязательная статистика (CipherStats); подключается через CryptoContext.enable_stats
+    _stats = None
+
     def __init__(
         self,
         key_expansion: IKeyExpansion,
@@ -20,6 +22,7 @@ class FeistelNetwork(IFeistelNetwork, ISymmetricCipher):
         
         self.master_key = master_key
         self.round_keys = self.key_expansion.generate_round_keys(master_key) if master_key else []
+        self._cache_round_keys()
 
     @property
     def block_size(self) -> int:
@@ -28,6 +31,17 @@ class FeistelNetwork(IFeistelNetwork, ISymmetricCipher):
     @property
     def rounds(self) -> int:
         return self._rounds
+
+    @property
+    def stats(self):
+        return self._stats
+
+    @stats.setter
+    def stats(self, stats):
+        # Ключевые расписания считает само расширение ключа - по промахам своего кэша
+        self._stats = stats
+        if hasattr(self.key_expansion, 'stats'):
+            self.key_expansion.stats = stats
     
     def _validate_parameters(self):
         if self._block_size <= 0 or self._block_size % 2 != 0:
@@ -40,51 +54,90 @@ class FeistelNetwork(IFeistelNetwork, ISymmetricCipher):
             raise TypeError('Блок должен быть байтовым')
         if len(block) != self._block_size:
             raise ValueError(f'Размер блока ожидается как {self._block_size} {len(block)} байт')
+
+    def _validate_buffers(self, buf, out):
+        if len(buf) % self._block_size != 0:
+            raise ValueError(f'Размер данных должен быть кратен размеру блока {self._block_size} байт')
+        if len(out) < len(buf):
+            raise ValueError('Размер выходного буфера меньше размера входных данных')
     
     def generate_round_keys(self, master_key: bytes) -> list:
         return self.key_expansion.generate_round_keys(master_key)
     
-    def _process_block(self, block: bytes, round_keys: list, reverse: bool = False) -> bytes:
-        keys = list(reversed(round_keys)) if reverse else round_keys
-        
-        half_size = self._block_size // 2
-        L = block[:half_size]
-        R = block[half_size:]
+    def _prepare_round_key(self, round_key: bytes):
+        return self.encryptor.prepare_round_key(round_key)
 
-        for i in range(self._rounds):
-            new_L = R
-            f_result = self.encryptor.Feistel_function(R, keys[i])
-            new_R = xor_bytes(L, f_result)
-            L, R = new_L, new_R
+    def _count(self, name: str, value: int = 1):
+        self._stats.count_cipher(type(self).__name__, name, value)
 
-        return R + L
+    def _cache_round_keys(self):
+        # Ключи в форме для раундовой функции и их обратный порядок готовятся один раз
+        self._encrypt_keys = [self._prepare_round_key(round_key) for round_key in self.round_keys]
+        self._decrypt_keys = self._encrypt_keys[::-1]
 
-    def encrypt_block(self, block: bytes, master_key: bytes = None) -> bytes:
-        self._validate_block(block)
-        
+    def _round_keys_for(self, decrypt: bool, master_key: bytes = None) -> list:
         if master_key is not None:
             round_keys = self.key_expansion.generate_round_keys(master_key)
-        elif self.round_keys:
-            round_keys = self.round_keys
-        else:
+            keys = [self._prepare_round_key(round_key) for round_key in round_keys]
+            return keys[::-1] if decrypt else keys
+        if not self.round_keys:
             raise ValueError("Не установлен мастер-ключ или раундовые ключи")
         
+        return self._decrypt_keys if decrypt else self._encrypt_keys
+
+    def _process_block_int(self, block: int, keys: list, round_function=None) -> int:
+        function = round_function or self.encryptor.Feistel_function_int
         
-        result = self._process_block(block, round_keys, reverse=False)
-        return result
+        half_size = self._block_size // 2
+        half_bits = half_size * 8
+        L = block >> half_bits
+        R = block & ((1 << half_bits) - 1)
+
+        for round_key in keys:
+            L, R = R, L ^ function(R, round_key, half_size)
+
+        return (R << half_bits) | L
+
+    def _crypt_int(self, block: int, keys: list) -> int:
+        # Преобразование целого блока; шифры с начальной перестановкой переопределяют его
+        return self._process_block_int(block, keys)
+
+    def encrypt_block(self, block: bytes, master_key: bytes = None) -> bytes:
+        self._validate_block(block)
+        keys = self._round_keys_for(False, master_key)
+        if self._stats is not None:
+            self._count('blocks')
+        
+        result = self._crypt_int(int.from_bytes(block, 'big'), keys)
+        return result.to_bytes(self._block_size, 'big')
 
     def decrypt_block(self, block: bytes, master_key: bytes = None) -> bytes:
         self._validate_block(block)
+        keys = self._round_keys_for(True, master_key)
+        if self._stats is not None:
+            self._count('blocks')
         
-        if master_key is not None:
-            round_keys = self.key_expansion.generate_round_keys(master_key)
-        elif self.round_keys:
-            round_keys = self.round_keys
-        else:
-            raise ValueError("Не установлен мастер-ключ или раундовые ключи")
+        result = self._crypt_int(int.from_bytes(block, 'big'), keys)
+        return result.to_bytes(self._block_size, 'big')
+
+    def encrypt_blocks(self, buf, out):
+        self._process_blocks(buf, out, decrypt=False)
+
+    def decrypt_blocks(self, buf, out):
+        self._process_blocks(buf, out, decrypt=True)
+
+    def _process_blocks(self, buf, out, decrypt: bool):
+        # Проверки и выбор ключей выполняются один раз на весь буфер
+        self._validate_buffers(buf, out)
+        keys = self._round_keys_for(decrypt)
+        if self._stats is not None:
+            self._count('blocks', len(buf) // self._block_size)
+        crypt = self._crypt_int
+        size = self._block_size
         
-        result = self._process_block(block, round_keys, reverse=True)
-        return result
+        for start in range(0, len(buf), size):
+            block = int.from_bytes(buf[start:start + size], 'big')
+            out[start:start + size] = crypt(block, keys).to_bytes(size, 'big')
 
     def set_round_keys(self, round_keys: list):
         if not isinstance(round_keys, list):
@@ -94,5 +147,6 @@ class FeistelNetwork(IFeistelNetwork, ISymmetricCipher):
     
         self.round_keys = round_keys.copy()
         self.master_key = None  
+        self._cache_round_keys()
 
 
@@ -0,0 +1,112 @@
+from threading import Condition, Thread
+from typing import List, Optional
+from src.utils.constants import CipherMode
+from src.utils.bit_utils import xor_bytes
+from src.utils.block_utils import split_blocks, join_blocks
+
+
+class OFBKeystream:
+    # Поток ключей OFB заранее вырабатывается рабочим потоком в кольцевой буфер,
+    # поэтому обработка пришедшего сообщения сводится к одному XOR
+    def __init__(self, context, iv: Optional[bytes] = None, buffer_blocks: int = 4096, chunk_blocks: Optional[int] = None):
+        if context.mode != CipherMode.OFB:
+            raise ValueError(f"Поток ключей заранее вырабатывается только в режиме OFB, а не {context.mode}")
+
+        chunk_blocks = chunk_blocks or min(64, buffer_blocks)
+        if chunk_blocks <= 0 or buffer_blocks < chunk_blocks:
+            raise ValueError("Буфер потока ключей должен вмещать хотя бы одну порцию блоков")
+
+        self.context = context
+        self.block_size = context.block_size
+        self.chunk_blocks = chunk_blocks
+        self._state = iv or context.iv
+        self._ring = bytearray(buffer_blocks * self.block_size)
+        self._read_position = 0
+        self._write_position = 0
+        self._closed = False
+        self._error = None
+        self._condition = Condition()
+
+        self._thread = Thread(target=self._produce, daemon=True)
+        self._thread.start()
+
+    def _free_space(self) -> int:
+        return len(self._ring) - (self._write_position - self._read_position)
+
+    def _produce(self):
+        chunk_size = self.chunk_blocks * self.block_size
+
+        try:
+            while True:
+                with self._condition:
+                    while not self._closed and self._free_space() < chunk_size:
+                        self._condition.wait()
+                    if self._closed:
+                        return
+
+                chunk = self.context.ofb_keystream(self._state, self.chunk_blocks)
+                self._state = chunk[-self.block_size:]
+
+                with self._condition:
+                    self._copy_in(chunk)
+                    self._write_position += len(chunk)
+                    self._condition.notify_all()
+        except Exception as error:
+            with self._condition:
+                self._error = error
+                self._condition.notify_all()
+
+    def _copy_in(self, chunk: bytes):
+        start = self._write_position % len(self._ring)
+        first = min(len(chunk), len(self._ring) - start)
+        self._ring[start:start + first] = chunk[:first]
+        self._ring[:len(chunk) - first] = chunk[first:]
+
+    def _copy_out(self, target: memoryview, length: int):
+        start = self._read_position % len(self._ring)
+        first = min(length, len(self._ring) - start)
+        target[:first] = self._ring[start:start + first]
+        target[first:length] = self._ring[:length - first]
+
+    def read(self, length: int) -> bytes:
+        result = bytearray(length)
+        view = memoryview(result)
+        filled = 0
+
+        while filled < length:
+            with self._condition:
+                while self._write_position == self._read_position:
+                    if self._error is not None:
+                        raise self._error
+                    if self._closed:
+                        raise ValueError("Поток ключей OFB уже закрыт")
+                    self._condition.wait()
+
+                available = min(length - filled, self._write_position - self._read_position)
+                self._copy_out(view[filled:], available)
+                self._read_position += available
+                filled += available
+                self._condition.notify_all()
+
+        return bytes(result)
+
+    def process(self, data: bytes) -> bytes:
+        # В OFB шифрование и расшифрование совпадают
+        return xor_bytes(data, self.read(len(data)))
+
+    def process_blocks(self, blocks: List[bytes]) -> List[bytes]:
+        if not blocks:
+            return []
+        return split_blocks(self.process(join_blocks(blocks)), self.block_size)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
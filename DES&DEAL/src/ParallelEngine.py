@@ -0,0 +1,133 @@
+import asyncio
+import mmap
+import os
+import pickle
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+from src.utils.block_utils import split_blocks, join_blocks
+
+
+_worker_context = None
+
+
+def _init_worker(context_state: bytes):
+    # Контекст вместе с ключевым расписанием передается в процесс один раз
+    global _worker_context
+    _worker_context = pickle.loads(context_state)
+    _worker_context.disable_stats()
+
+
+def _run_task(function, args: tuple, collect: bool):
+    # Если в родителе включена статистика, задача собирает свою и возвращает ее вместе с результатом
+    stats = _worker_context.enable_stats() if collect else None
+    try:
+        return function(*args), stats.export() if stats is not None else None
+    finally:
+        if collect:
+            _worker_context.disable_stats()
+
+
+def _process_chunk(data: bytes, encrypt: bool, iv: Optional[bytes]) -> bytes:
+    blocks = split_blocks(data, _worker_context.block_size)
+    method = _worker_context.encrypt_blocks if encrypt else _worker_context.decrypt_blocks
+    return join_blocks(method(blocks, iv))
+
+
+def _process_file_region(path_in: str, path_out: str, offset: int, length: int, encrypt: bool, iv: Optional[bytes]):
+    # Процесс сам отображает оба файла в память и пишет результат прямо в выходной файл
+    with open(path_in, 'rb') as src, open(path_out, 'r+b') as dst:
+        with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as src_map, mmap.mmap(dst.fileno(), 0) as dst_map:
+            with memoryview(src_map) as view:
+                _worker_context.process_region(view[offset:offset + length], dst_map, offset, encrypt, iv)
+
+
+class ParallelEngine:
+    # Меньшие куски не окупают передачу данных между процессами
+    min_chunk_blocks = 4096
+
+    def __init__(self, context, workers: Optional[int] = None):
+        # Контекст владеет движком, поэтому обратная ссылка слабая: иначе незакрытый
+        # контекст держал бы процессы пула до прихода сборщика циклов
+        self._context = weakref.ref(context)
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = None
+        self._finalizer = None
+        self.fingerprint = None
+
+    @property
+    def context(self):
+        return self._context()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Пулу передается снимок контекста, а не сам объект, чтобы не замкнуть ссылки
+            self.fingerprint = self.context.parallel_fingerprint()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(pickle.dumps(self.context),)
+            )
+            self._finalizer = weakref.finalize(self, self._executor.shutdown, False)
+        return self._executor
+
+    def _split_tasks(self, blocks: List[bytes], encrypt: bool) -> list:
+        chunk_blocks = max(self.min_chunk_blocks, -(-len(blocks) // self.workers))
+
+        tasks = []
+        for start in range(0, len(blocks), chunk_blocks):
+            chunk = join_blocks(blocks[start:start + chunk_blocks])
+            previous_block = blocks[start - 1] if start else None
+            tasks.append((chunk, encrypt, self.context.chunk_iv(start, previous_block)))
+        return tasks
+
+    def _collect(self, results: list) -> list:
+        # Счетчики и время из процессов добавляются к статистике контекста
+        stats = self.context.stats
+        for _, exported in results:
+            if stats is not None and exported is not None:
+                stats.merge(exported)
+        return [result for result, _ in results]
+
+    def _join_results(self, results: list) -> List[bytes]:
+        block_size = self.context.block_size
+        return [block for data in self._collect(results) for block in split_blocks(data, block_size)]
+
+    def process(self, blocks: List[bytes], encrypt: bool) -> List[bytes]:
+        tasks = self._split_tasks(blocks, encrypt)
+        if len(tasks) <= 1:
+            method = self.context.encrypt_blocks if encrypt else self.context.decrypt_blocks
+            return method(blocks)
+
+        executor = self._get_executor()
+        collect = self.context.stats is not None
+        futures = [executor.submit(_run_task, _process_chunk, task, collect) for task in tasks]
+        return self._join_results([future.result() for future in futures])
+
+    async def process_async(self, blocks: List[bytes], encrypt: bool) -> List[bytes]:
+        tasks = self._split_tasks(blocks, encrypt)
+        if len(tasks) <= 1:
+            method = self.context.encrypt_blocks if encrypt else self.context.decrypt_blocks
+            return await asyncio.to_thread(method, blocks)
+
+        executor = self._get_executor()
+        collect = self.context.stats is not None
+        futures = [asyncio.wrap_future(executor.submit(_run_task, _process_chunk, task, collect)) for task in tasks]
+        return self._join_results(await asyncio.gather(*futures))
+
+    def process_file(self, path_in: str, path_out: str, regions: list, encrypt: bool):
+        executor = self._get_executor()
+        collect = self.context.stats is not None
+        futures = [
+            executor.submit(_run_task, _process_file_region, (path_in, path_out, offset, length, encrypt, iv), collect)
+            for offset, length, iv in regions
+        ]
+        self._collect([future.result() for future in futures])
+
+    def close(self):
+        if self._executor is not None:
+            self._finalizer.detach()
+            self._executor.shutdown()
+            self._executor = None
+            self._finalizer = None
+            self.fingerprint = None
@@ -12,6 +12,15 @@ class IEncryptor(ABC):
         
     @abstractmethod
     async def Feistel_function_async(self, input_block, round_key): pass
+
+    # Целочисленный уровень: половины блока передаются как целые числа big-endian.
+    # По умолчанию это обертка над Feistel_function; шифры переопределяют его
+    def prepare_round_key(self, round_key):
+        return round_key
+
+    def Feistel_function_int(self, input_block, round_key, half_size):
+        output = self.Feistel_function(input_block.to_bytes(half_size, 'big'), round_key)
+        return int.from_bytes(output, 'big')
         
 
 class ISymmetricCipher(ABC):
@@ -31,6 +40,17 @@ class ISymmetricCipher(ABC):
     @abstractmethod
     async def decrypt_block_async(self, block): pass
 
+    # Пакетная обработка: блоки из buf записываются в out по тем же смещениям
+    def encrypt_blocks(self, buf, out):
+        size = self.block_size
+        for start in range(0, len(buf), size):
+            out[start:start + size] = self.encrypt_block(bytes(buf[start:start + size]))
+
+    def decrypt_blocks(self, buf, out):
+        size = self.block_size
+        for start in range(0, len(buf), size):
+            out[start:start + size] = self.decrypt_block(bytes(buf[start:start + size]))
+
 
 class IFeistelNetwork(ISymmetricCipher):
     @property
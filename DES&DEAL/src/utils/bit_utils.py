@@ -1,6 +1,17 @@
-import random
+import os
+from functools import lru_cache
+from threading import Lock
 from src.utils.constants import BitOrder
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Начиная с такой длины буфера XOR через NumPy быстрее XOR целых чисел
+NUMPY_XOR_THRESHOLD = 256
+
 
 def bytes_to_bits(data, bit_order=BitOrder.LSB):
     bits = []
@@ -37,15 +48,83 @@ def bits_to_bytes(bits, bit_order=BitOrder.LSB):
 
 
 def xor_bytes(a, b):
-    result = bytearray()
-    for byte_a, byte_b in zip(a, b):
-        result.append(byte_a ^ byte_b)
-    
-    return bytes(result)
+    # Как и раньше, длина результата равна длине более короткого аргумента
+    length = min(len(a), len(b))
+    if np is not None and length >= NUMPY_XOR_THRESHOLD:
+        return np.bitwise_xor(
+            np.frombuffer(a, dtype=np.uint8, count=length),
+            np.frombuffer(b, dtype=np.uint8, count=length)
+        ).tobytes()
+
+    value = int.from_bytes(a[:length], 'big') ^ int.from_bytes(b[:length], 'big')
+    return value.to_bytes(length, 'big')
+
+
+def xor_into(target, a, b):
+    # XOR без промежуточного результата: пишет a ^ b в начало target
+    length = min(len(a), len(b))
+    target = memoryview(target).cast('B')
+    if len(target) < length:
+        raise ValueError("Буфер для результата XOR меньше входных данных")
+
+    if np is not None and length >= NUMPY_XOR_THRESHOLD:
+        np.bitwise_xor(
+            np.frombuffer(a, dtype=np.uint8, count=length),
+            np.frombuffer(b, dtype=np.uint8, count=length),
+            out=np.frombuffer(target, dtype=np.uint8, count=length)
+        )
+    else:
+        value = int.from_bytes(a[:length], 'big') ^ int.from_bytes(b[:length], 'big')
+        target[:length] = value.to_bytes(length, 'big')
+
+    return length
+
+
+class RandomPool:
+    # Случайные байты os.urandom читаются большими порциями и раздаются из буфера
+    def __init__(self, chunk_size=1 << 16):
+        if chunk_size <= 0:
+            raise ValueError("Размер порции случайных байт должен быть положительным")
+
+        self.chunk_size = chunk_size
+        self._buffer = b''
+        self._position = 0
+        self._pid = os.getpid()
+        self._lock = Lock()
+
+    def read(self, length):
+        if length < 0:
+            raise ValueError("Количество случайных байт не может быть отрицательным")
+        if length > self.chunk_size:
+            return os.urandom(length)
+
+        with self._lock:
+            # После fork дочерний процесс не должен выдавать те же байты, что и родитель
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._buffer = b''
+                self._position = 0
+
+            if self._position + length > len(self._buffer):
+                self._buffer = os.urandom(self.chunk_size)
+                self._position = 0
+
+            start = self._position
+            self._position += length
+            return self._buffer[start:self._position]
+
+
+_random_pool = RandomPool()
 
 
 def random_bytes(length):
-    return bytes([random.randint(0, 255) for _ in range(length)])
+    return _random_pool.read(length)
+
+
+def random_blocks(count, block_size):
+    # Пачка IV или nonce одним чтением из пула
+    data = random_bytes(count * block_size)
+    return [data[i:i + block_size] for i in range(0, len(data), block_size)]
 
 
 def rotate_left(data, n):
@@ -59,7 +138,7 @@ def rotate_left(data, n):
 
 
 
-def permutation(data, permutation, bit_order=BitOrder.LSB, start_at_zero=False):
+def _permutation_bits(data, permutation, bit_order=BitOrder.LSB, start_at_zero=False):
     bits = bytes_to_bits(data, bit_order)
     
     result_bits = []
@@ -74,3 +153,58 @@ def permutation(data, permutation, bit_order=BitOrder.LSB, start_at_zero=False):
     return bits_to_bytes(result_bits, bit_order)
 
 
+def _bit_position(index, size, bit_order):
+    # Позиция бита с номером index в целом числе big-endian из size байт
+    offset = index % 8 if bit_order == BitOrder.LSB else 7 - index % 8
+    return (size - 1 - index // 8) * 8 + offset
+
+
+class CompiledPermutation:
+    def __init__(self, permutation, bit_order=BitOrder.LSB, start_at_zero=False):
+        indices = [pos if start_at_zero else pos - 1 for pos in permutation]
+        if not indices or min(indices) < 0:
+            raise ValueError("Некорректная таблица перестановки")
+
+        self.in_size = max(indices) // 8 + 1
+        self.out_size = (len(indices) + 7) // 8
+
+        tables = [[0] * 256 for _ in range(self.in_size)]
+        for out_index, in_index in enumerate(indices):
+            out_mask = 1 << _bit_position(out_index, self.out_size, bit_order)
+            in_mask = 1 << _bit_position(in_index % 8, 1, bit_order)
+            table = tables[in_index // 8]
+            for value in range(256):
+                if value & in_mask:
+                    table[value] |= out_mask
+
+        self.tables = tuple(
+            ((self.in_size - 1 - byte_index) * 8, tuple(table))
+            for byte_index, table in enumerate(tables)
+        )
+
+    def __call__(self, value):
+        result = 0
+        for shift, table in self.tables:
+            result |= table[(value >> shift) & 0xFF]
+        
+        return result
+
+    def apply(self, data):
+        return self(int.from_bytes(data, 'big')).to_bytes(self.out_size, 'big')
+
+
+@lru_cache(maxsize=None)
+def _compile_permutation(permutation, bit_order, start_at_zero):
+    return CompiledPermutation(permutation, bit_order, start_at_zero)
+
+
+def compile_permutation(permutation, bit_order=BitOrder.LSB, start_at_zero=False):
+    return _compile_permutation(tuple(permutation), bit_order, start_at_zero)
+
+
+def permutation(data, permutation, bit_order=BitOrder.LSB, start_at_zero=False):
+    compiled = compile_permutation(permutation, bit_order, start_at_zero)
+    if len(data) != compiled.in_size:
+        return _permutation_bits(data, permutation, bit_order, start_at_zero)
+
+    return compiled.apply(data)
@@ -0,0 +1,69 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, List
+
+
+class BlockMemo:
+    # Результаты детерминированного поблочного преобразования (ECB) для уже
+    # встречавшихся блоков; повторяющиеся блоки не передаются шифру
+    def __init__(self, maxsize: int = 4096):
+        if maxsize <= 0:
+            raise ValueError("Размер кэша блоков должен быть положительным")
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._blocks = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def process(self, blocks: List[bytes], compute: Callable[[List[bytes]], List[bytes]]) -> List[bytes]:
+        with self._lock:
+            results = []
+            for block in blocks:
+                result = self._blocks.get(block)
+                if result is not None:
+                    self._blocks.move_to_end(block)
+                results.append(result)
+
+        # Одинаковые блоки внутри пакета тоже вычисляются один раз
+        missing = list(dict.fromkeys(block for block, result in zip(blocks, results) if result is None))
+        computed = dict(zip(missing, compute(missing))) if missing else {}
+
+        with self._lock:
+            self.hits += len(blocks) - len(missing)
+            self.misses += len(missing)
+            for block, result in computed.items():
+                self._blocks[block] = result
+                self._blocks.move_to_end(block)
+            while len(self._blocks) > self.maxsize:
+                self._blocks.popitem(last=False)
+
+        return [computed[block] if result is None else result for block, result in zip(blocks, results)]
+
+    def clear(self):
+        with self._lock:
+            self._blocks.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': len(self._blocks),
+            'maxsize': self.maxsize
+        }
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = Lock()
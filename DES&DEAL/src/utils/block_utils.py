@@ -1,6 +1,11 @@
 from src.utils.constants import PaddingMode
 from src.utils.bit_utils import random_bytes
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 def split_blocks(data: bytes, block_size: int) -> list[bytes]:
     if len(data) % block_size != 0:
@@ -16,56 +21,153 @@ def join_blocks(blocks: list[bytes]) -> bytes:
     return b''.join(blocks)
 
 
-def padding(data: bytes, block_size: int, mode: PaddingMode) -> bytes:
-    if block_size <= 0 or block_size > 255:
-        raise ValueError("Размер блока должен быть в диапозоне [0, 255]")
+def counter_value(counter: bytes, index: int = 0) -> bytes:
+    # Счетчик - целое big-endian число по модулю 2^(8 * размер блока)
+    size = len(counter)
+    modulus = 1 << (8 * size)
+    return ((int.from_bytes(counter, 'big') + index) % modulus).to_bytes(size, 'big')
 
-    pad_len = block_size - (len(data) % block_size)
-    
+
+def counter_blocks(counter: bytes, start: int, count: int) -> bytes:
+    size = len(counter)
+    modulus = 1 << (8 * size)
+    base = (int.from_bytes(counter, 'big') + start) % modulus
+
+    if np is not None and size in (8, 16) and count > 0:
+        return _counter_blocks_numpy(base, size, count)
+
+    # Диапазон делится в точке переполнения, после которой счетчик начинается с нуля
+    wrap = min(count, modulus - base)
+    values = list(range(base, base + wrap)) + list(range(0, count - wrap))
+    return b''.join([value.to_bytes(size, 'big') for value in values])
+
+
+def _counter_blocks_numpy(base: int, size: int, count: int) -> bytes:
+    word_mask = (1 << 64) - 1
+    low = np.arange(count, dtype=np.uint64)
+    low += np.uint64(base & word_mask)
+    if size == 8:
+        return low.astype('>u8').tobytes()
+
+    # Перенос в старшее слово там, где младшее переполнилось
+    high = (low < np.uint64(base & word_mask)).astype(np.uint64)
+    high += np.uint64(base >> 64)
+
+    result = np.empty((count, 2), dtype='>u8')
+    result[:, 0] = high
+    result[:, 1] = low
+    return result.tobytes()
+
+
+def _padding_bytes(pad_len: int, mode: PaddingMode) -> bytes:
     if mode == PaddingMode.ZEROS:
-        return data + bytes(pad_len)
+        return bytes(pad_len)
     elif mode == PaddingMode.ANSI_X923:
-        return data + bytes(pad_len - 1) + bytes([pad_len])
+        return bytes(pad_len - 1) + bytes([pad_len])
     elif mode == PaddingMode.PKCS7:
-        return data + bytes([pad_len] * pad_len)
+        return bytes([pad_len] * pad_len)
     elif mode == PaddingMode.ISO_10126:
-        return data + random_bytes(pad_len - 1) + bytes([pad_len])
+        return random_bytes(pad_len - 1) + bytes([pad_len])
     else:
-        return data
+        return b''
 
 
-def unpadding(data: bytes, mode: PaddingMode) -> bytes:
+def _check_block_size(block_size: int):
+    if block_size <= 0 or block_size > 255:
+        raise ValueError("Размер блока должен быть в диапозоне [0, 255]")
+
+
+def padding(data: bytes, block_size: int, mode: PaddingMode) -> bytes:
+    _check_block_size(block_size)
+
+    pad_len = block_size - (len(data) % block_size)
+    return data + _padding_bytes(pad_len, mode)
+
+
+def padding_block(tail: bytes, block_size: int, mode: PaddingMode) -> bytes:
+    # Набивка затрагивает только неполный хвост сообщения
+    _check_block_size(block_size)
+    if len(tail) >= block_size:
+        raise ValueError("Хвост сообщения должен быть короче блока")
+
+    return bytes(tail) + _padding_bytes(block_size - len(tail), mode)
+
+
+def padded_blocks(data: bytes, block_size: int, mode: PaddingMode) -> list[bytes]:
+    # Блоки тела берутся прямо из data, новый буфер создается только для хвоста
+    body_size = len(data) - len(data) % block_size
+    blocks = [data[i:i + block_size] for i in range(0, body_size, block_size)]
+
+    last_block = padding_block(data[body_size:], block_size, mode)
+    if last_block:
+        blocks.append(last_block)
+    return blocks
+
+
+_PADDING_ERRORS = {
+    PaddingMode.PKCS7: "Ошибка режима набивки. "
+        "Для PKCS7 ожидается, что каждый байт набивки равен размеру набивки.",
+    PaddingMode.ANSI_X923: "Ошибка режима набивки. "
+        "Для ANSI X.923 ожидается, что каждый байт набивки равен нулю.",
+    PaddingMode.ISO_10126: "Некорректное значение размера набивки. "
+        "Ожидается, что набивка присутствует и ее размер не превышает размер сообщения."
+}
+
+
+def _padding_error(data, pad_len: int, mode: PaddingMode) -> int:
+    # Время проверки не зависит ни от размера набивки, ни от места ошибки:
+    # просматривается окно из последних байт, а ошибки накапливаются через OR
+    window = min(len(data), 256)
+    error = ((pad_len - 1) >> 9) & 1 | ((window - pad_len) >> 9) & 1
+    if mode == PaddingMode.ISO_10126:
+        return error
+
+    expected = pad_len if mode == PaddingMode.PKCS7 else 0
+    for i in range(2, window + 1):
+        inside = ((i - pad_len - 1) >> 9) & 1
+        error |= -inside & (data[-i] ^ expected)
+
+    return error
+
+
+def unpadded_length(data, mode: PaddingMode) -> int:
     if len(data) == 0:
-        return data
+        return 0
 
     if mode == PaddingMode.ZEROS:
         end_index = len(data)
         while end_index > 0 and data[end_index - 1] == 0:
             end_index -= 1
-        return data[:end_index]
-    
-    elif mode in (PaddingMode.ANSI_X923, PaddingMode.PKCS7, PaddingMode.ISO_10126):
+        return end_index
+
+    elif mode in _PADDING_ERRORS:
         pad_len = data[-1]
-        if pad_len == 0 or pad_len > len(data):
-            raise ValueError("Некорректное значение размера набивки." 
-                "Ожидается, что набивка присутствует и ее размер не превышает размер сообщения."
-            )
-        
-        if mode == PaddingMode.PKCS7:
-            for i in range(len(data) - pad_len, len(data)):
-                if data[i] != pad_len:
-                    raise ValueError("Ошибка режима набивки." 
-                        "Для PKCS7 ожидается, что каждый байт набивки равен размеру набивки."
-                    )
-                
-        elif mode == PaddingMode.ANSI_X923:
-            for i in range(len(data) - pad_len, len(data) - 1):
-                if data[i] != 0:
-                    raise ValueError("Ошибка режима набивки. " 
-                        "Для ANSI X.923 ожидается, что каждый байт набивки равен нулю."
-                    )
-        
-        return data[:-pad_len]
-    
+        if _padding_error(data, pad_len, mode):
+            raise ValueError(_PADDING_ERRORS[mode])
+        return len(data) - pad_len
+
     else:
-        return data
\ No newline at end of file
+        return len(data)
+
+
+def unpadding(data: bytes, mode: PaddingMode) -> bytes:
+    length = unpadded_length(data, mode)
+    return data if length == len(data) else data[:length]
+
+
+def unpadded_blocks(blocks: list[bytes], mode: PaddingMode) -> list[bytes]:
+    # Набивка снимается с хвостовых блоков, тело сообщения не копируется
+    tail_start = len(blocks)
+    tail_size = 0
+    while tail_start > 0:
+        tail_start -= 1
+        tail_size += len(blocks[tail_start])
+        if mode == PaddingMode.ZEROS:
+            if any(blocks[tail_start]):
+                break
+        elif tail_size >= 256:
+            break
+
+    tail = join_blocks(blocks[tail_start:])
+    length = unpadded_length(tail, mode)
+    return blocks[:tail_start] + ([tail[:length]] if length else [])
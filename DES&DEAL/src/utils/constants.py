@@ -150,6 +150,13 @@ class PaddingMode(Enum):
     ISO_10126 = "ISO_10126"
 
 
+class BatchBackend(Enum):
+    AUTO = "AUTO"
+    NUMPY = "NUMPY"
+    BITSLICE = "BITSLICE"
+    BLOCK = "BLOCK"
+
+
 class AlgorithmConstants:
     DES_BLOCK_SIZE = 8
     DEAL_BLOCK_SIZE = 16
@@ -0,0 +1,113 @@
+from collections import defaultdict
+from contextlib import nullcontext
+from threading import Lock
+from time import perf_counter_ns
+from typing import Callable, Optional
+
+
+# Общий пустой контекст для выключенных замеров: не создает объектов на каждый вызов
+NO_TIMER = nullcontext()
+
+
+class _Timer:
+    __slots__ = ('stats', 'mode', 'phase', 'start')
+
+    def __init__(self, stats, mode: str, phase: str):
+        self.stats = stats
+        self.mode = mode
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stats.add_time(self.mode, self.phase, perf_counter_ns() - self.start)
+
+
+class CipherStats:
+    # Счетчики и время по этапам в разрезе режимов и отдельно счетчики шифров
+    # и ключевых расписаний; callback(kind, mode, name, value) вызывается
+    # на каждое событие, если нужно отправлять данные дальше
+    def __init__(self, callback: Optional[Callable[[str, str, str, int], None]] = None):
+        self.callback = callback
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = defaultdict(int)
+            self.timings = defaultdict(int)
+            self.cipher_counters = defaultdict(int)
+            self.loop_lag = {'samples': 0, 'total_ns': 0, 'max_ns': 0}
+
+    def count(self, mode: str, name: str, value: int = 1):
+        with self._lock:
+            self.counters[(mode, name)] += value
+        if self.callback is not None:
+            self.callback('count', mode, name, value)
+
+    def count_cipher(self, cipher: str, name: str, value: int = 1):
+        with self._lock:
+            self.cipher_counters[(cipher, name)] += value
+        if self.callback is not None:
+            self.callback('cipher', cipher, name, value)
+
+    def add_time(self, mode: str, phase: str, elapsed_ns: int):
+        with self._lock:
+            self.timings[(mode, phase)] += elapsed_ns
+        if self.callback is not None:
+            self.callback('time', mode, phase, elapsed_ns)
+
+    def timer(self, mode: str, phase: str) -> _Timer:
+        return _Timer(self, mode, phase)
+
+    def record_loop_lag(self, lag_ns: int):
+        with self._lock:
+            self.loop_lag['samples'] += 1
+            self.loop_lag['total_ns'] += lag_ns
+            self.loop_lag['max_ns'] = max(self.loop_lag['max_ns'], lag_ns)
+        if self.callback is not None:
+            self.callback('loop_lag', None, 'lag', lag_ns)
+
+    def export(self) -> dict:
+        # Сырые значения для передачи из рабочего процесса и последующего merge
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'timings': dict(self.timings),
+                'cipher_counters': dict(self.cipher_counters)
+            }
+
+    def merge(self, exported: dict):
+        for (mode, name), value in exported['counters'].items():
+            self.count(mode, name, value)
+        for (mode, phase), value in exported['timings'].items():
+            self.add_time(mode, phase, value)
+        for (cipher, name), value in exported['cipher_counters'].items():
+            self.count_cipher(cipher, name, value)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            result = {}
+            for (mode, name), value in self.counters.items():
+                result.setdefault(mode, {}).setdefault('counters', {})[name] = value
+            for (mode, phase), value in self.timings.items():
+                result.setdefault(mode, {}).setdefault('time_ns', {})[phase] = value
+
+            ciphers = {}
+            for (cipher, name), value in self.cipher_counters.items():
+                ciphers.setdefault(cipher, {})[name] = value
+
+            lag = dict(self.loop_lag)
+            lag['mean_ns'] = lag['total_ns'] / lag['samples'] if lag['samples'] else 0
+            return {'modes': result, 'ciphers': ciphers, 'loop_lag': lag}
+
+    def __getstate__(self):
+        # В рабочие процессы уходит пустая статистика без блокировки и обратного вызова
+        return {}
+
+    def __setstate__(self, state):
+        self.callback = None
+        self._lock = Lock()
+        self.reset()
@@ -0,0 +1,80 @@
+from abc import abstractmethod
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Iterable, List
+from src.interfaces import IKeyExpansion
+
+
+class KeyScheduleCache:
+    def __init__(self, maxsize: int = 256):
+        if maxsize <= 0:
+            raise ValueError("Размер кэша ключевых расписаний должен быть положительным")
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._schedules = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._schedules)
+
+    def get(self, key: bytes, generate: Callable[[bytes], List[bytes]]) -> List[bytes]:
+        key = bytes(key)
+
+        with self._lock:
+            schedule = self._schedules.get(key)
+            if schedule is not None:
+                self._schedules.move_to_end(key)
+                self.hits += 1
+                return list(schedule)
+            self.misses += 1
+
+        schedule = tuple(generate(key))
+
+        with self._lock:
+            self._schedules[key] = schedule
+            self._schedules.move_to_end(key)
+            while len(self._schedules) > self.maxsize:
+                self._schedules.popitem(last=False)
+
+        return list(schedule)
+
+    def precompute(self, keys: Iterable[bytes], generate: Callable[[bytes], List[bytes]]):
+        for key in keys:
+            self.get(key, generate)
+
+    def clear(self):
+        with self._lock:
+            self._schedules.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._schedules),
+            'maxsize': self.maxsize
+        }
+
+
+class CachedKeyExpansion(IKeyExpansion):
+    cache: KeyScheduleCache
+    # Необязательная статистика (CipherStats): считаются только промахи кэша,
+    # то есть действительно выработанные расписания
+    stats = None
+
+    @abstractmethod
+    def expand_key(self, key: bytes) -> List[bytes]: pass
+
+    def _expand_key_counted(self, key: bytes) -> List[bytes]:
+        self.stats.count_cipher(type(self).__name__, 'key_schedules')
+        return self.expand_key(key)
+
+    def generate_round_keys(self, key: bytes) -> List[bytes]:
+        generate = self.expand_key if self.stats is None else self._expand_key_counted
+        return self.cache.get(key, generate)
+
+    def precompute(self, keys: Iterable[bytes]):
+        self.cache.precompute(keys, self.expand_key)